@@ -1,9 +1,22 @@
+from datetime import datetime, timezone
 from flask_sqlalchemy import SQLAlchemy
 
 db = SQLAlchemy()
 
+
+def utcnow():
+    """
+    Naive UTC now, for column defaults. Unlike SQL current_timestamp
+    ('YYYY-MM-DD HH:MM:SS' on SQLite) it is stored with microseconds, the
+    format SQLAlchemy binds datetimes in, so stored values compare
+    correctly with bound ones.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 # Import all models to register them with SQLAlchemy
+from app.models.id_counter_model import IdCounter
 from app.models.user_model import User
 from app.models.task_model import Task
 from app.models.patient_model import Patient
-from app.models.log_model import Log
+from app.models.log_model import Log, LogArchive
+from app.models.queue_event_model import QueueEvent
@@ -0,0 +1,120 @@
+import logging
+from app.models import db
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+# Prefix -> (table, id column) for the string IDs handed out by reserve_ids
+ID_SEQUENCES = {
+    "E": ("users", "emp_id"),
+    "T": ("tasks", "task_id"),
+    "P": ("patients", "patient_id"),
+    "L": ("logs", "log_id"),
+}
+
+# Digits every ID is zero-padded to, so string order is numeric order (T000000999 < T000001000)
+ID_DIGITS = 9
+
+# Prefix -> other (table, column) pairs holding IDs of that prefix, rewritten with them by ensure_id_width
+ID_REFERENCES = {
+    "E": [("tasks", "assigned_to"), ("logs", "user_id"), ("logs_archive", "user_id")],
+    "T": [("queue_events", "task_id")],
+    "P": [("tasks", "patient_id")],
+    "L": [("logs_archive", "log_id")],
+}
+
+
+class IdCounter(db.Model):
+    __tablename__ = "id_counters"
+
+    prefix = db.Column(db.String(10), primary_key=True)
+    last_value = db.Column(db.Integer, nullable=False, default=0)  # Highest number handed out so far
+
+    def __repr__(self):
+        return f"<IdCounter {self.prefix}={self.last_value}>"
+
+
+def _seed_counter(connection, prefix):
+    """
+    Create the counter row for a prefix from the highest numeric suffix
+    already in use. Runs once per prefix.
+    """
+    table, column = ID_SEQUENCES[prefix]
+    start = len(prefix) + 1
+    current = connection.execute(text(
+        f"SELECT MAX(CAST(SUBSTR({column}, {start}) AS INTEGER)) FROM {table} "
+        f"WHERE {column} LIKE :pattern"
+    ), {"pattern": f"{prefix}%"}).scalar() or 0
+    connection.execute(
+        text("INSERT INTO id_counters (prefix, last_value) VALUES (:prefix, :value)"),
+        {"prefix": prefix, "value": current},
+    )
+
+
+def reserve_ids(connection, prefix, count=1):
+    """
+    Reserve `count` consecutive numbers for a prefix and return them as a range.
+
+    The counter is bumped on the caller's connection, so the reservation
+    commits or rolls back together with the rows that use it, and the
+    UPDATE takes the write lock that makes concurrent inserts safe.
+    """
+    bump = text("UPDATE id_counters SET last_value = last_value + :count WHERE prefix = :prefix")
+    if connection.execute(bump, {"count": count, "prefix": prefix}).rowcount == 0:
+        _seed_counter(connection, prefix)
+        connection.execute(bump, {"count": count, "prefix": prefix})
+    last_value = connection.execute(
+        text("SELECT last_value FROM id_counters WHERE prefix = :prefix"), {"prefix": prefix}
+    ).scalar()
+    return range(last_value - count + 1, last_value + 1)
+
+
+def format_id(prefix, number):
+    return f"{prefix}{number:0{ID_DIGITS}d}"
+
+
+def next_string_ids(connection, prefix, count=1):
+    """Reserve `count` IDs formatted with the prefix and ID_DIGITS digits, e.g. T000000001."""
+    return [format_id(prefix, n) for n in reserve_ids(connection, prefix, count)]
+
+
+def ensure_id_width():
+    """
+    Rewrite IDs issued with fewer than ID_DIGITS digits (T001, ..., T1000)
+    to the padded form, together with every column that refers to them,
+    so keyset cursors and queue tie-breaks order them numerically. Tokens
+    issued for a rewritten emp_id stop working; those users log in again.
+    """
+    if db.engine.dialect.name != "sqlite":
+        return
+    try:
+        tables = set(inspect(db.engine).get_table_names())
+        with db.engine.begin() as connection:
+            for prefix, (table, column) in ID_SEQUENCES.items():
+                short_ids = connection.execute(text(
+                    f"SELECT {column} FROM {table} WHERE {column} LIKE :pattern AND length({column}) < :width"
+                ), {"pattern": f"{prefix}%", "width": len(prefix) + ID_DIGITS}).scalars().all()
+                renamed = [
+                    {"old": old, "new": format_id(prefix, int(old[len(prefix):]))}
+                    for old in short_ids if old[len(prefix):].isdigit()
+                ]
+                if not renamed:
+                    continue
+                for ref_table, ref_column in [(table, column)] + ID_REFERENCES[prefix]:
+                    if ref_table in tables:
+                        connection.execute(
+                            text(f"UPDATE {ref_table} SET {ref_column} = :new WHERE {ref_column} = :old"), renamed
+                        )
+                logger.info(f"Padded {len(renamed)} {table}.{column} IDs to {ID_DIGITS} digits.")
+    except Exception as e:
+        logger.error(f"Error padding IDs: {e}")
+
+
+def ensure_id_counters():
+    """Create the counters table and seed a row for every prefix."""
+    IdCounter.__table__.create(db.engine, checkfirst=True)
+    with db.engine.begin() as connection:
+        existing = {row[0] for row in connection.execute(text("SELECT prefix FROM id_counters"))}
+        for prefix in ID_SEQUENCES:
+            if prefix not in existing:
+                _seed_counter(connection, prefix)
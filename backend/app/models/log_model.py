@@ -1,36 +1,50 @@
-from app.models import db
-from sqlalchemy import event, text
+from app.models import db, utcnow
+from app.models.id_counter_model import next_string_ids
+from sqlalchemy import event
 
 class Log(db.Model):
     __tablename__ = "logs"
 
-    log_id = db.Column(db.String(20), unique=True, nullable=False, primary_key=True)  # Auto-generated ID like L001
+    log_id = db.Column(db.String(20), unique=True, nullable=False, primary_key=True)  # Auto-generated ID like L000000001
     user_id = db.Column(db.String(10), db.ForeignKey('users.emp_id'), nullable=False)
     action = db.Column(db.Text, nullable=False)
-    timestamp = db.Column(db.DateTime, default=db.func.current_timestamp())
+    timestamp = db.Column(db.DateTime, default=utcnow)
+
+    # Newest-first listing, overall and per user, walks these indexes
+    __table_args__ = (
+        db.Index('idx_log_timestamp', 'timestamp', 'log_id'),
+        db.Index('idx_log_user_timestamp', 'user_id', 'timestamp', 'log_id'),
+    )
 
     user = db.relationship("User", backref="logs", lazy=True)
 
     def __repr__(self):
         return f"<Log {self.log_id} - {self.action} by User {self.user_id}>"
 
+class LogArchive(db.Model):
+    """Log entries rotated out of the hot logs table; see app.utils.audit_log.rotate_logs."""
+    __tablename__ = "logs_archive"
+
+    log_id = db.Column(db.String(20), primary_key=True)
+    user_id = db.Column(db.String(10), nullable=False)
+    action = db.Column(db.Text, nullable=False)
+    timestamp = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('idx_log_archive_timestamp', 'timestamp', 'log_id'),
+        db.Index('idx_log_archive_user_timestamp', 'user_id', 'timestamp', 'log_id'),
+    )
+
+    def __repr__(self):
+        return f"<LogArchive {self.log_id} - {self.action} by User {self.user_id}>"
+
+def next_log_ids(connection, count=1):
+    """
+    Reserve `count` consecutive log IDs in one counter update.
+    """
+    return next_string_ids(connection, "L", count)
+
 # Generate the auto-incremented log ID before insert
 @event.listens_for(Log, 'before_insert')
 def generate_log_id(mapper, connection, target):
-    # Query the highest existing log_id
-    result = connection.execute(text("SELECT MAX(log_id) FROM logs")).fetchone()
-    max_log_id = result[0]
-
-    if max_log_id and max_log_id.startswith('L'):
-        # Extract the numeric part of the log_id and increment it
-        try:
-            max_id = int(max_log_id[1:])  # Strip the prefix 'L'
-            next_id = max_id + 1
-        except ValueError:
-            next_id = 1  # Handle unexpected non-numeric values gracefully
-    else:
-        # If no records exist or log_id is invalid, start with 1
-        next_id = 1
-
-    # Format the new log ID with the prefix and leading zeros
-    target.log_id = f"L{next_id:03d}"
+    target.log_id = next_log_ids(connection)[0]
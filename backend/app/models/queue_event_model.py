@@ -0,0 +1,17 @@
+from app.models import db, utcnow
+
+
+class QueueEvent(db.Model):
+    __tablename__ = "queue_events"
+
+    event_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    task_id = db.Column(db.String(50), nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # "upsert" or "delete"
+    origin = db.Column(db.String(64), nullable=False)  # host:pid of the writing worker
+    created_at = db.Column(db.DateTime, default=utcnow, index=True)
+
+    # Never hand out an event_id again once it was used, even after its row is pruned
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    def __repr__(self):
+        return f"<QueueEvent {self.event_id} - {self.op} {self.task_id} from {self.origin}>"
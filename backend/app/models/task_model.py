@@ -1,46 +1,90 @@
-from app.models import db
-from sqlalchemy import event, text
+import enum
+from app.models import db, utcnow
+from app.models.id_counter_model import next_string_ids
+from app.models.user_model import STAFF_ROLES
+from sqlalchemy import event, literal
+from sqlalchemy.orm import validates
+
+
+class TaskStatus(str, enum.Enum):
+    """Canonical task statuses; only Pending tasks wait in the priority queue."""
+    PENDING = "Pending"
+    IN_PROGRESS = "In-Progress"
+    COMPLETED = "Completed"
+
+    @classmethod
+    def normalize(cls, value):
+        """
+        Map a status in any casing or separator style ('pending',
+        'in progress', 'IN_PROGRESS') to its canonical value.
+        """
+        if isinstance(value, cls):
+            return value.value
+        folded = str(value).strip().lower().replace("_", "-").replace(" ", "-")
+        for status in cls:
+            if folded == status.value.lower() or folded == status.value.lower().replace("-", ""):
+                return status.value
+        raise ValueError(f"Unknown task status: {value!r}; expected one of {', '.join(s.value for s in cls)}")
+
+
+# Status of tasks that belong in the priority queue
+QUEUED_STATUS = TaskStatus.PENDING.value
+
+
+def routable_role(role):
+    """Validate a task's assigned_role: one of STAFF_ROLES, or None for no role."""
+    if role is not None and role not in STAFF_ROLES:
+        raise ValueError(f"assigned_role must be one of: {', '.join(STAFF_ROLES)}")
+    return role
+
 
 class Task(db.Model):
     __tablename__ = "tasks"
 
-    task_id = db.Column(db.String(50), unique=True, nullable=False, primary_key=True)  # Auto-generated ID like T001
+    task_id = db.Column(db.String(50), unique=True, nullable=False, primary_key=True)  # Auto-generated ID like T000000001
     patient_id = db.Column(db.String(50), db.ForeignKey('patients.patient_id'), nullable=False)  # Foreign key referencing Patient
     description = db.Column(db.Text, nullable=False)
     urgency = db.Column(db.Integer, nullable=False)
     time_sensitive = db.Column(db.DateTime, nullable=False)
-    status = db.Column(db.String(20), default='pending')
-    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
-    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+    status = db.Column(db.String(20), default=QUEUED_STATUS, nullable=False, index=True)  # A TaskStatus value
+    assigned_to = db.Column(db.String(10), db.ForeignKey('users.emp_id'), nullable=True)  # Clinician the task is assigned to or claimed by
+    assigned_role = db.Column(db.String(20), nullable=True)  # Role the task is routed to while nobody is assigned
+    created_at = db.Column(db.DateTime, default=utcnow)
+    updated_at = db.Column(db.DateTime, default=utcnow, onupdate=utcnow)
 
-    # Index for faster querying when sorting by urgency and time sensitivity
+    # Index for faster querying when sorting by urgency and time sensitivity;
+    # idx_task_queued covers loading the queue, which only reads Pending rows
     __table_args__ = (
         db.Index('idx_urgency_time', 'urgency', 'time_sensitive'),
+        db.Index('idx_task_queued', 'urgency', 'time_sensitive', 'task_id',
+                 sqlite_where=db.text("status = 'Pending'"), postgresql_where=db.text("status = 'Pending'")),
+        db.Index('idx_task_updated_at', 'updated_at'),
+        db.Index('idx_task_assigned', 'assigned_to', 'status'),
     )
 
     # Use back_populates to match the Patient model
     patient = db.relationship('Patient', back_populates='tasks', lazy=True)
 
+    @validates("status")
+    def validate_status(self, key, value):
+        return TaskStatus.normalize(value)
+
+    @validates("assigned_role")
+    def validate_assigned_role(self, key, value):
+        return routable_role(value)
+
     def __repr__(self):
         return f"<Task {self.task_id} - {self.description[:30]}... for Patient {self.patient_id}>"
 
-# Generate the auto-incremented task ID before insert
+def is_queued():
+    """
+    Filter for tasks that belong in the queue. The status is rendered as an
+    inline literal so SQLite can match the partial idx_task_queued index,
+    which a bound parameter would rule out.
+    """
+    return Task.status == literal(QUEUED_STATUS, literal_execute=True)
+
+# Generate the auto-incremented task ID before insert from the shared counter
 @event.listens_for(Task, 'before_insert')
 def generate_task_id(mapper, connection, target):
-    # Query the highest existing task_id
-    result = connection.execute(text("SELECT MAX(task_id) FROM tasks")).fetchone()
-    max_task_id = result[0]
-
-    if max_task_id and max_task_id.startswith('T'):
-        # Extract the numeric part of the task_id and increment it
-        try:
-            max_id = int(max_task_id[1:])  # Strip the prefix 'T'
-            next_id = max_id + 1
-        except ValueError:
-            next_id = 1  # Handle unexpected non-numeric values gracefully
-    else:
-        # If no records exist or task_id is invalid, start with 1
-        next_id = 1
-
-    # Format the new task ID with the prefix and leading zeros
-    target.task_id = f"T{next_id:03d}"
+    target.task_id = next_string_ids(connection, "T")[0]
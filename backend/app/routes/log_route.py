@@ -1,39 +1,77 @@
-from flask import Blueprint, request, jsonify
-from app.models.log_model import Log
+from flask import Blueprint, request, jsonify, current_app
+from app.models.log_model import Log, LogArchive
 from app.models import db
+from app.models.user_model import ADMINISTRATOR
+from app.utils.auth import role_required
+from app.utils.db_engine import get_read_session
+from app.utils.pagination import keyset_page, parse_limit, parse_stream_format, serialize_row, stream_rows
 from datetime import datetime
 import logging
+import math
+import threading
+import time
 
 log_routes = Blueprint("log_routes", __name__)
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Columns returned for each log entry
+LOG_FIELDS = ("log_id", "user_id", "action", "timestamp")
+
+# Cached totals keyed by (table, user_id, start_date, end_date)
+MAX_CACHED_COUNTS = 1024
+_count_cache = {}
+_count_cache_lock = threading.Lock()
+
+
+def count_logs(model, query, cache_key):
+    """
+    Total rows matching a log query, recounted at most once per LOG_COUNT_TTL
+    seconds for the same filters.
+    """
+    ttl = current_app.config["LOG_COUNT_TTL"]
+    now = time.monotonic()
+    with _count_cache_lock:
+        cached = _count_cache.get(cache_key)
+    if cached and now - cached[1] < ttl:
+        return cached[0]
+    total = query.with_entities(db.func.count(model.log_id)).scalar()
+    with _count_cache_lock:
+        if len(_count_cache) >= MAX_CACHED_COUNTS:
+            _count_cache.clear()
+        _count_cache[cache_key] = (total, now)
+    return total
+
+
 @log_routes.route('/logs', methods=['GET'])
+@role_required(ADMINISTRATOR)
 def get_logs():
     """
-    Retrieve all logs with optional filters (e.g., user_id, date range).
+    Retrieve logs newest first with optional filters (e.g., user_id, date range).
+    Pass `limit` (and the returned `next_cursor` as `cursor`) to page by
+    (timestamp, log_id); add `total=true` for a cached count of matches.
+    `page`/`per_page` still work and report the cached total. With
+    `stream=json` or `stream=ndjson` every matching log is streamed
+    instead. `archived=true` reads entries rotated to logs_archive.
     """
     user_id = request.args.get("user_id")
     start_date = request.args.get("start_date")
     end_date = request.args.get("end_date")
-    page = int(request.args.get("page", 1))
-    per_page = int(request.args.get("per_page", 10))
+    model = LogArchive if request.args.get("archived", "").lower() == "true" else Log
 
-    query = Log.query
+    query = get_read_session().query(model)
 
     try:
         # Filter by user_id if provided
         if user_id:
-            if not user_id.isdigit():
-                return jsonify({"error": "Invalid user_id. Must be a numeric value."}), 400
-            query = query.filter(Log.user_id == user_id)
+            query = query.filter(model.user_id == user_id)
 
         # Filter by start_date if provided
         if start_date:
             try:
                 start_date_parsed = datetime.fromisoformat(start_date)
-                query = query.filter(Log.timestamp >= start_date_parsed)
+                query = query.filter(model.timestamp >= start_date_parsed)
             except ValueError:
                 return jsonify({"error": "Invalid start_date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)."}), 400
 
@@ -41,7 +79,7 @@ def get_logs():
         if end_date:
             try:
                 end_date_parsed = datetime.fromisoformat(end_date)
-                query = query.filter(Log.timestamp <= end_date_parsed)
+                query = query.filter(model.timestamp <= end_date_parsed)
             except ValueError:
                 return jsonify({"error": "Invalid end_date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)."}), 400
 
@@ -49,10 +87,38 @@ def get_logs():
         logger.error(f"Error processing filters: {str(e)}")
         return jsonify({"error": "Error processing filters."}), 500
 
-    # Paginate results
-    logs_paginated = query.order_by(Log.timestamp.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
+    try:
+        stream_format = parse_stream_format(request.args.get("stream"))
+        limit = parse_limit(request.args.get("limit"))
+        page = int(request.args.get("page", 1))
+        per_page = int(request.args.get("per_page", 10))
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+
+    columns = [getattr(model, field) for field in LOG_FIELDS]
+    order_columns = (model.timestamp, model.log_id)
+    cache_key = (model.__tablename__, user_id, start_date, end_date)
+
+    if stream_format:
+        return stream_rows(query.order_by(model.timestamp.desc(), model.log_id.desc()), columns, LOG_FIELDS,
+                           stream_format)
+
+    if limit is not None or request.args.get("cursor"):
+        try:
+            rows, next_cursor = keyset_page(query, order_columns, columns, limit or 10,
+                                            request.args.get("cursor"), descending=True)
+        except ValueError as ve:
+            return jsonify({"error": str(ve)}), 400
+        response = {"logs": [serialize_row(row, LOG_FIELDS) for row in rows], "next_cursor": next_cursor}
+        if request.args.get("total", "").lower() == "true":
+            response["total"] = count_logs(model, query, cache_key)
+        return jsonify(response), 200
+
+    # Paginate results; the total comes from the count cache instead of a COUNT(*) per page
+    logs_paginated = query.order_by(model.timestamp.desc(), model.log_id.desc()).paginate(
+        page=page, per_page=per_page, error_out=False, count=False
     )
+    total = count_logs(model, query, cache_key)
 
     # Return paginated logs
     return jsonify({
@@ -61,11 +127,11 @@ def get_logs():
                 "log_id": log.log_id,
                 "user_id": log.user_id,
                 "action": log.action,
-                "timestamp": log.timestamp.isoformat(),
+                "timestamp": log.timestamp.isoformat() if log.timestamp else None,
             }
             for log in logs_paginated.items
         ],
-        "total": logs_paginated.total,
+        "total": total,
         "page": logs_paginated.page,
-        "pages": logs_paginated.pages,
+        "pages": math.ceil(total / per_page) if per_page else 0,
     }), 200
@@ -1,20 +1,18 @@
 from flask import request, jsonify, current_app
 from app.models.patient_model import Patient
-from app.models.log_model import Log
+from app.models.user_model import ADMINISTRATOR, DOCTOR, STAFF_ROLES
 from app.models import db
 from app.routes import patient_routes
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.utils.audit_log import log_action
+from app.utils.auth import role_required
+from app.utils.db_engine import get_read_session
+from app.utils.pagination import (keyset_page, parse_fields, parse_limit, parse_stream_format, project_columns,
+                                  serialize_row, stream_rows)
+from flask_jwt_extended import get_jwt_identity
 
 
-def log_action(user_id, action):
-    """
-    Helper function to create a log entry.
-    """
-    if not user_id:
-        raise ValueError("Invalid user ID")
-    new_log = Log(user_id=user_id, action=action)
-    db.session.add(new_log)
-    db.session.commit()
+# Columns GET /patients can return
+PATIENT_FIELDS = ("patient_id", "first_name", "last_name", "age", "gender", "condition", "created_at", "updated_at")
 
 
 def get_current_user_id():
@@ -25,30 +23,38 @@ def get_current_user_id():
 
 
 @patient_routes.route('/patients', methods=['GET'])
-@jwt_required()
+@role_required(*STAFF_ROLES)
 def get_patients():
-    """Get all patients."""
+    """
+    Get patients. `fields` limits the returned columns; pass `limit` (and
+    the returned `next_cursor` as `cursor`) to page by patient_id, or
+    `stream=json` / `stream=ndjson` to export every patient as a stream.
+    """
     try:
-        patients = Patient.query.all()
-        return jsonify([
-            {
-                "patient_id": patient.patient_id,
-                "first_name": patient.first_name,
-                "last_name": patient.last_name,
-                "age": patient.age,
-                "gender": patient.gender,
-                "condition": patient.condition,
-                "created_at": patient.created_at.isoformat() if patient.created_at else None,
-                "updated_at": patient.updated_at.isoformat() if patient.updated_at else None,
-            }
-            for patient in patients
-        ]), 200
+        fields = parse_fields(request.args.get('fields'), PATIENT_FIELDS)
+        query = get_read_session().query(Patient)
+        stream_format = parse_stream_format(request.args.get('stream'))
+        if stream_format:
+            return stream_rows(query.order_by(Patient.patient_id), project_columns(Patient, fields),
+                               fields, stream_format)
+
+        limit = parse_limit(request.args.get('limit'))
+        if limit is None:
+            rows = query.with_entities(*project_columns(Patient, fields)).order_by(Patient.patient_id).all()
+            return jsonify([serialize_row(row, fields) for row in rows]), 200
+
+        order_columns = (Patient.patient_id,)
+        rows, next_cursor = keyset_page(query, order_columns, project_columns(Patient, fields, order_columns),
+                                        limit, request.args.get('cursor'))
+        return jsonify({"patients": [serialize_row(row, fields) for row in rows], "next_cursor": next_cursor}), 200
+    except ValueError as ve:
+        return jsonify({"error": f"Invalid input: {str(ve)}"}), 400
     except Exception as e:
         return jsonify({"error": "Failed to fetch patients", "details": str(e)}), 500
 
 
 @patient_routes.route('/patients', methods=['POST'])
-@jwt_required()
+@role_required(*STAFF_ROLES)
 def add_patient():
     """Add a new patient."""
     try:
@@ -62,11 +68,12 @@ def add_patient():
             condition=data["condition"]
         )
         db.session.add(new_patient)
-        db.session.commit()
+        db.session.flush()
 
-        # Log the action
+        # Log the action in the same transaction
         user_id = get_current_user_id()
         log_action(user_id, f"Created patient {new_patient.patient_id}")
+        db.session.commit()
 
         return jsonify({"message": "Patient added successfully", "patient_id": new_patient.patient_id}), 201
     except Exception as e:
@@ -75,7 +82,7 @@ def add_patient():
 
 
 @patient_routes.route('/patients/<string:patient_id>', methods=['PUT'])
-@jwt_required()
+@role_required(*STAFF_ROLES)
 def update_patient(patient_id):
     """Update an existing patient."""
     try:
@@ -92,11 +99,10 @@ def update_patient(patient_id):
         patient.gender = data.get('gender', patient.gender)
         patient.condition = data.get('condition', patient.condition)
 
-        db.session.commit()
-
-        # Log the action
+        # Log the action in the same transaction
         user_id = get_current_user_id()
         log_action(user_id, f"Updated patient {patient.patient_id}")
+        db.session.commit()
 
         return jsonify({"message": "Patient updated successfully", "patient_id": patient.patient_id}), 200
     except Exception as e:
@@ -105,7 +111,7 @@ def update_patient(patient_id):
 
 
 @patient_routes.route('/patients/<string:patient_id>', methods=['DELETE'])
-@jwt_required()
+@role_required(ADMINISTRATOR, DOCTOR)
 def delete_patient(patient_id):
     """Delete a patient and handle associated tasks."""
     try:
@@ -118,21 +124,20 @@ def delete_patient(patient_id):
         # Access the priority queue from the application context
         priority_queue = current_app.task_priority_queue
 
-        # Remove tasks associated with the patient
+        # Delete tasks associated with the patient
+        task_ids = [task.task_id for task in patient.tasks]
         for task in patient.tasks:
-            # Remove the task from the priority queue
-            priority_queue.remove(task.task_id)
-
-            # Delete the task from the database
             db.session.delete(task)
 
-        # Delete the patient
+        # Delete the patient and log the action in the same transaction
         db.session.delete(patient)
-        db.session.commit()
-
-        # Log the action
         user_id = get_current_user_id()
         log_action(user_id, f"Deleted patient {patient.patient_id} and associated tasks")
+        db.session.commit()
+
+        # Remove the tasks from the priority queue once the delete is committed
+        for task_id in task_ids:
+            priority_queue.discard(task_id)
 
         return jsonify({"message": "Patient and associated tasks deleted successfully"}), 200
 
@@ -1,21 +1,42 @@
-from flask import Blueprint, request, jsonify, current_app
-from app.models.task_model import Task
+from flask import Blueprint, Response, request, jsonify, current_app
+from app.models.task_model import QUEUED_STATUS, Task, TaskStatus, is_queued, routable_role
 from app.models.patient_model import Patient
-from app.utils.priority_queue import TaskPriorityQueue
+from app.models.id_counter_model import next_string_ids
+from app.models.user_model import ADMINISTRATOR, DOCTOR, STAFF_ROLES, User
+from app.utils.priority_queue import ASSIGNEE_PARTITION, ROLE_PARTITION, TaskSnapshot, partitions_for
+from app.utils.queue_sync import publish_task_events, queue_watermark, reconcile_queue
+from app.utils.audit_log import log_action
+from app.utils.auth import create_scoped_token, current_user, role_required, scoped_token_claims, verify_scoped_token
+from app.utils.dashboard_data import get_dashboard_delta, get_dashboard_payload, serialize_task
+from app.utils.task_stream import DASHBOARD_STREAM_SCOPE, STREAM_TOKEN_SCOPE, StreamFull, resume_event
+from app.utils.db_engine import get_read_session
+from app.utils.pagination import (keyset_page, parse_fields, parse_limit, parse_stream_format, project_columns,
+                                  serialize_row, stream_rows)
 from app import db
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import insert, select, update
 from datetime import datetime
+import csv
+import io
+import json
 
 task_routes = Blueprint("task_routes", __name__)
 
-def log_action(user_id, action):
-    """
-    Helper function to log user actions.
-    """
-    from app.models.log_model import Log
-    new_log = Log(user_id=user_id, action=action)
-    db.session.add(new_log)
-    db.session.commit()
+# Upper bound on ?n= for POST /tasks/claim
+MAX_CLAIM_BATCH = 50
+
+# Rows validated and inserted per transaction by POST /tasks/bulk
+BULK_CHUNK_SIZE = 500
+
+# Columns GET /tasks can return
+TASK_FIELDS = ("task_id", "patient_id", "description", "urgency", "time_sensitive", "status", "assigned_to",
+               "assigned_role")
+
+# Sort orders for GET /tasks; "priority" walks the idx_urgency_time index
+TASK_ORDERS = {
+    "id": (Task.task_id,),
+    "priority": (Task.urgency, Task.time_sensitive, Task.task_id),
+}
 
 def get_current_user_id():
     """
@@ -23,83 +44,242 @@ def get_current_user_id():
     """
     return get_jwt_identity()
 
+def validate_assignee(emp_id):
+    """Check an assigned_to value against the user cache; empty clears the assignment."""
+    if not emp_id:
+        return None
+    if current_app.login_pipeline.identity(str(emp_id)) is None:
+        raise ValueError(f"User with ID {emp_id} does not exist")
+    return str(emp_id)
+
+def requested_partition():
+    """Queue partition named by the `assignee` or `role` query argument, if any."""
+    if request.args.get("assignee"):
+        return (ASSIGNEE_PARTITION, request.args["assignee"])
+    if request.args.get("role"):
+        return (ROLE_PARTITION, request.args["role"])
+    return None
+
+@task_routes.route("/health", methods=["GET"])
+def health():
+    """
+    Readiness probe: 200 once the database answers and the priority queue
+    has finished warming up, 503 until then. A failed warm-up reports
+    queue "failed" and its error until POST /tasks/sync rebuilds the queue.
+    """
+    priority_queue = current_app.task_priority_queue
+    status = {"database": "ok", "queue": "ready" if priority_queue.ready else "warming", "queued_tasks": len(priority_queue)}
+    if priority_queue.warmup_error is not None:
+        status["queue"] = "failed"
+        status["queue_error"] = priority_queue.warmup_error
+    try:
+        db.session.execute(select(1))
+    except Exception as e:
+        status["database"] = f"error: {e}"
+    ready = status["database"] == "ok" and priority_queue.ready
+    status["status"] = "ok" if ready else "unavailable"
+    return jsonify(status), 200 if ready else 503
+
 @task_routes.route("/tasks/dashboard", methods=["GET"])
 
 def get_heap_tasks_dashboard():
     """
     Fetch all tasks in the in-memory priority queue.
+    The body is cached per queue version and honours If-None-Match.
+    With `since=<version>` and the `epoch` it came from, only the added,
+    changed and removed tasks are returned; a stale version, or a missing
+    or different epoch, falls back to the full list with `"full": true`.
     """
     try:
-        # Fetch tasks from the in-memory priority queue
-        heap_tasks = current_app.task_priority_queue.get_all_tasks()
+        since = request.args.get("since")
+        if since is not None:
+            delta = get_dashboard_delta(int(since), request.args.get("epoch"))
+            if delta is None:
+                priority_queue = current_app.task_priority_queue
+                version, entries = priority_queue.versioned_tasks()
+                return jsonify({
+                    "version": version,
+                    "epoch": priority_queue.epoch,
+                    "full": True,
+                    "tasks": [serialize_task(task) for _, task in entries],
+                }), 200
+            return jsonify(delta), 200
+
+        version, etag, body = get_dashboard_payload()
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, status=200, mimetype="application/json")
+        response.set_etag(etag)
+        response.headers["X-Queue-Version"] = str(version)
+        return response
+    except ValueError as ve:
+        return jsonify({"error": f"Invalid input: {str(ve)}"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        # Return a properly structured response
-        return jsonify([
-            {
-                "task_id": task["task_id"],
-                "patient_id": task["patient_id"],
-                "description": task["description"],
-                "urgency": task["urgency"],
-                "time_sensitive": task["time_sensitive"].isoformat() if task["time_sensitive"] else None,
-                "status": task["status"]
-            }
-            for task in heap_tasks
-        ]), 200
+@task_routes.route("/tasks/stream/token", methods=["POST"])
+@role_required(*STAFF_ROLES)
+def issue_stream_token():
+    """
+    Short-lived token for /tasks/stream?token=…, since EventSource cannot
+    send an Authorization header. Fetch a new one for every (re)connect.
+    """
+    ttl = current_app.config["STREAM_TOKEN_TTL"]
+    token = create_scoped_token(current_user().emp_id, STREAM_TOKEN_SCOPE, ttl)
+    return jsonify({"token": token, "expires_in": ttl}), 200
+
+
+@task_routes.route("/tasks/stream", methods=["GET"])
+def stream_tasks():
+    """
+    Server-Sent Events feed of queue changes, authenticated by a token
+    from /tasks/stream/token (or the dashboard's own). The first event is the full queue (or, with
+    Last-Event-ID or `last_event_id`, the missed delta); each later
+    `tasks` event carries the added, changed and removed tasks.
+    """
+    token = request.args.get("token")
+    if scoped_token_claims(token, DASHBOARD_STREAM_SCOPE) is None:
+        user = verify_scoped_token(token, STREAM_TOKEN_SCOPE)
+        if user is None:
+            return jsonify({"error": "Invalid or expired stream token"}), 401
+        if user.role not in STAFF_ROLES:
+            return jsonify({"error": f"Requires role: {', '.join(STAFF_ROLES)}"}), 403
+    broadcaster = current_app.task_broadcaster
+    priority_queue = current_app.task_priority_queue
+    try:
+        subscriber = broadcaster.subscribe()
+    except StreamFull:
+        return jsonify({"error": "Too many task stream subscribers; try again later"}), 503
+    try:
+        # A reconnect with a fresh token cannot set Last-Event-ID, so it is also accepted as a parameter
+        last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+        initial_version, initial_message = resume_event(priority_queue, last_event_id)
     except Exception as e:
+        broadcaster.unsubscribe(subscriber)
         return jsonify({"error": str(e)}), 500
 
+    return Response(
+        broadcaster.stream(subscriber, initial_version, initial_message),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @task_routes.route("/tasks", methods=["GET"])
-@jwt_required()
+@role_required(*STAFF_ROLES)
 def get_tasks():
     """
-    Fetch all tasks from the database.
+    Fetch tasks from the database.
+    Filters: `status` (comma-separated), `patient_id`, `assigned_to`,
+    `assigned_role`, `urgency_min`, `urgency_max`, `due_after` and
+    `due_before` (ISO datetimes bounding time_sensitive). `fields` limits the returned columns.
+    Pass `limit` (and the returned `next_cursor` as `cursor`) to page by
+    task_id, or by priority with `order=priority`; without `limit` the
+    full list is returned as before. `stream=json` or `stream=ndjson`
+    exports every matching task as a streamed response instead.
     """
     try:
-        tasks = Task.query.all()
-        return jsonify([
-            {
-                "task_id": task.task_id,
-                "patient_id": task.patient_id,
-                "description": task.description,
-                "urgency": task.urgency,
-                "time_sensitive": task.time_sensitive.isoformat() if task.time_sensitive else None,
-                "status": task.status
-            }
-            for task in tasks
-        ]), 200
+        fields = parse_fields(request.args.get("fields"), TASK_FIELDS)
+        query = get_read_session().query(Task)
+        status = request.args.get("status")
+        if status:
+            query = query.filter(Task.status.in_([TaskStatus.normalize(value) for value in status.split(",")]))
+        if request.args.get("patient_id"):
+            query = query.filter(Task.patient_id == request.args["patient_id"])
+        if request.args.get("assigned_to"):
+            query = query.filter(Task.assigned_to == request.args["assigned_to"])
+        if request.args.get("assigned_role"):
+            query = query.filter(Task.assigned_role == request.args["assigned_role"])
+        if request.args.get("urgency_min") is not None:
+            query = query.filter(Task.urgency >= int(request.args["urgency_min"]))
+        if request.args.get("urgency_max") is not None:
+            query = query.filter(Task.urgency <= int(request.args["urgency_max"]))
+        if request.args.get("due_after"):
+            query = query.filter(Task.time_sensitive >= datetime.fromisoformat(request.args["due_after"]))
+        if request.args.get("due_before"):
+            query = query.filter(Task.time_sensitive <= datetime.fromisoformat(request.args["due_before"]))
+
+        order = request.args.get("order", "id")
+        if order not in TASK_ORDERS:
+            return jsonify({"error": f"order must be one of: {', '.join(TASK_ORDERS)}"}), 400
+        order_columns = TASK_ORDERS[order]
+
+        stream_format = parse_stream_format(request.args.get("stream"))
+        if stream_format:
+            return stream_rows(query.order_by(*order_columns), project_columns(Task, fields), fields, stream_format)
+
+        limit = parse_limit(request.args.get("limit"))
+        if limit is None:
+            rows = query.with_entities(*project_columns(Task, fields)).order_by(*order_columns).all()
+            return jsonify([serialize_row(row, fields) for row in rows]), 200
+
+        rows, next_cursor = keyset_page(query, order_columns, project_columns(Task, fields, order_columns),
+                                        limit, request.args.get("cursor"))
+        return jsonify({"tasks": [serialize_row(row, fields) for row in rows], "next_cursor": next_cursor}), 200
+    except ValueError as ve:
+        return jsonify({"error": f"Invalid input: {str(ve)}"}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @task_routes.route("/tasks/heap", methods=["GET"])
-@jwt_required()
+@role_required(*STAFF_ROLES)
 def get_heap_tasks():
     """
-    Fetch all tasks in the in-memory priority queue.
+    Fetch all tasks in the in-memory priority queue, in priority order.
+    Pass `limit` (and the returned `next_cursor` as `cursor`) to page
+    through the queue without materialising all of it. `assignee=<emp_id>`
+    or `role=<role>` (`*` for unrouted tasks) lists one sub-queue instead.
     """
     try:
-        heap_tasks = current_app.task_priority_queue.get_all_tasks()
-        return jsonify(heap_tasks), 200
+        partition = requested_partition()
+        limit = request.args.get("limit")
+        if limit is None:
+            heap_tasks = current_app.task_priority_queue.get_all_tasks(partition)
+            return jsonify(heap_tasks), 200
+
+        limit = int(limit)
+        if limit < 1:
+            return jsonify({"error": "limit must be a positive integer"}), 400
+        heap_tasks, next_cursor = current_app.task_priority_queue.page(limit, request.args.get("cursor"), partition)
+        return jsonify({"tasks": heap_tasks, "next_cursor": next_cursor}), 200
+    except ValueError as ve:
+        return jsonify({"error": f"Invalid input: {str(ve)}"}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @task_routes.route("/tasks/sync", methods=["POST"])
-@jwt_required()
+@role_required(*STAFF_ROLES)
 def sync_tasks_with_db():
     """
     Synchronize the in-memory priority queue with the database.
+    By default only tasks updated since the last sync are applied; tasks
+    deleted through another worker drop out on `full=true`, which (like a
+    queue that has never been loaded or is still warming up) rebuilds the
+    whole queue instead.
     """
     try:
-        # Fetch only pending tasks from the database to sync with the heap
-        tasks = Task.query.filter_by(status="Pending").all()
-        current_app.task_priority_queue.rebuild_heap(tasks)
-        return jsonify({"message": "Heap synchronized with database", "status": "success"}), 200
+        priority_queue = current_app.task_priority_queue
+        watermark = current_app.task_sync_watermark
+        if request.args.get("full", "").lower() == "true" or watermark is None or not priority_queue.ready:
+            # Stream pending tasks in queue order straight into a fresh heap, swapped in when complete
+            watermark = queue_watermark()
+            tasks = (Task.query.filter(is_queued()).with_entities(*TaskSnapshot.columns(Task))
+                     .order_by(*TaskSnapshot.queue_order(Task)).yield_per(5000))
+            priority_queue.bulk_load(tasks)
+            current_app.task_sync_watermark = watermark
+            return jsonify({"message": "Heap synchronized with database", "status": "success", "mode": "full"}), 200
+
+        current_app.task_sync_watermark, changed = reconcile_queue(priority_queue, watermark)
+        return jsonify({"message": "Heap synchronized with database", "status": "success",
+                        "mode": "incremental", "changed": changed}), 200
     except Exception as e:
         return jsonify({"error": f"Failed to sync: {str(e)}"}), 500
 
 
 @task_routes.route("/tasks/priority", methods=["GET"])
-@jwt_required()
+@role_required(*STAFF_ROLES)
 def fetch_highest_priority_task():
     """
     Fetch the highest-priority task from the in-memory queue.
@@ -120,11 +300,126 @@ def fetch_highest_priority_task():
         return jsonify({"error": str(e)}), 500
 
 
+@task_routes.route("/tasks/overdue", methods=["GET"])
+@role_required(*STAFF_ROLES)
+def fetch_overdue_tasks():
+    """
+    Fetch the queued tasks past their deadline, in priority order. The
+    queue tracks them as their deadline timers fire, so this reads only
+    the overdue tasks. `assignee=<emp_id>` or `role=<role>` narrows it to
+    one sub-queue.
+    """
+    try:
+        tasks = current_app.task_priority_queue.overdue_tasks(requested_partition())
+        return jsonify({"tasks": tasks, "count": len(tasks)}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@task_routes.route("/tasks/next", methods=["GET"])
+@role_required(*STAFF_ROLES)
+def fetch_my_next_task():
+    """
+    Fetch the caller's highest-priority task: the best of the tasks
+    assigned to them, routed to their role, or routed to nobody. Each of
+    those sub-queues is a heap, so this looks at three heap heads.
+    """
+    try:
+        user = current_user()
+        task = current_app.task_priority_queue.peek_partitions(partitions_for(user.emp_id, user.role))
+        if not task:
+            return jsonify({"error": "No tasks in the heap"}), 404
+        return jsonify(serialize_task(task)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@task_routes.route("/tasks/claim", methods=["POST"])
+@role_required(*STAFF_ROLES)
+def claim_tasks():
+    """
+    Take the highest-priority task(s) off the queue and assign them to the caller.
+    Pass `n` to claim up to n tasks at once, and `mine=true` to take them
+    only from the caller's sub-queues (see /tasks/next). Each task is
+    marked In-Progress with a conditional UPDATE, so a task already claimed
+    through another worker is skipped rather than assigned twice.
+    """
+    priority_queue = current_app.task_priority_queue
+    # Everything popped by this request, and the tasks another worker had already claimed
+    popped, taken_elsewhere = [], set()
+    claimed = []
+    try:
+        n = int(request.args.get("n", 1))
+        if not (1 <= n <= MAX_CLAIM_BATCH):
+            return jsonify({"error": f"n must be between 1 and {MAX_CLAIM_BATCH}"}), 400
+
+        user_id = get_current_user_id()
+        partitions = None
+        if request.args.get("mine", "").lower() == "true":
+            user = current_user()
+            partitions = partitions_for(user.emp_id, user.role)
+        while len(claimed) < n:
+            candidates = priority_queue.begin_claim(n - len(claimed), partitions)
+            if not candidates:
+                break
+            popped.extend(candidates)
+            for task in candidates:
+                result = db.session.execute(
+                    update(Task)
+                    .where(Task.task_id == task.task_id, Task.status == QUEUED_STATUS)
+                    .values(status=TaskStatus.IN_PROGRESS.value, assigned_to=user_id)
+                    .execution_options(synchronize_session=False)
+                )
+                if result.rowcount:
+                    claimed.append(task)
+                else:
+                    taken_elsewhere.add(task.task_id)
+
+        if not claimed:
+            return jsonify({"error": "No tasks in the heap"}), 404
+
+        claimed_ids = [task.task_id for task in claimed]
+        publish_task_events(claimed_ids)
+        log_action(user_id, f"Claimed tasks {', '.join(claimed_ids)}")
+        db.session.commit()
+
+        return jsonify([
+            {
+                "task_id": task.task_id,
+                "patient_id": task.patient_id,
+                "description": task.description,
+                "urgency": task.urgency,
+                "time_sensitive": task.time_sensitive.isoformat() if task.time_sensitive else None,
+                "status": TaskStatus.IN_PROGRESS.value,
+                "assigned_to": user_id,
+            }
+            for task in claimed
+        ]), 200
+    except ValueError as ve:
+        _unclaim(priority_queue, popped, taken_elsewhere)
+        return jsonify({"error": f"Invalid input: {str(ve)}"}), 400
+    except Exception as e:
+        _unclaim(priority_queue, popped, taken_elsewhere)
+        return jsonify({"error": str(e)}), 500
+    finally:
+        priority_queue.end_claim(popped)
+
+
+def _unclaim(priority_queue, popped, taken_elsewhere):
+    """
+    Roll back a failed claim and put every popped task back in the queue,
+    whether or not its UPDATE had run, except those already claimed elsewhere.
+    """
+    db.session.rollback()
+    priority_queue.push_many([task for task in popped if task.task_id not in taken_elsewhere])
+
+
 @task_routes.route("/tasks", methods=["POST"])
-@jwt_required()
+@role_required(*STAFF_ROLES)
 def add_task():
     """
-    Add a new task to the database and in-memory queue.
+    Add a new task to the database and in-memory queue. Optional
+    `assigned_to` (emp_id) and `assigned_role` route it to a sub-queue.
     """
     try:
         data = request.get_json()
@@ -150,33 +445,175 @@ def add_task():
             urgency=int(data["urgency"]),
             time_sensitive=time_sensitive,
             status=data["status"],
+            assigned_to=validate_assignee(data.get("assigned_to")),
+            assigned_role=data.get("assigned_role") or None,
         )
 
-        # Add the task to the database and commit it to generate task_id
+        # Add the task to the database and flush it to generate task_id
         db.session.add(new_task)
-        db.session.commit()
-
-        # Push the newly created task into the in-memory priority queue
-        current_app.task_priority_queue.push(new_task)
+        db.session.flush()
 
-        # Log the action
+        # Log the action in the same transaction
         user_id = get_current_user_id()
         log_action(user_id, f"Added task {new_task.task_id}")
+        db.session.commit()
+
+        # Push the newly created task into the in-memory priority queue
+        if new_task.status == QUEUED_STATUS:
+            current_app.task_priority_queue.push(new_task)
 
         return jsonify({"message": "Task added successfully", "task_id": new_task.task_id}), 201
 
+    except ValueError as ve:
+        db.session.rollback()
+        return jsonify({"error": f"Invalid input: {str(ve)}"}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
 
+def _iter_bulk_rows(stream, fmt):
+    """
+    Yield (row_number, row, error) triples from an NDJSON or CSV request
+    body as it is read; `error` is set for rows that cannot be parsed.
+    """
+    text_stream = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if fmt == "csv":
+        for row_number, row in enumerate(csv.DictReader(text_stream), start=1):
+            yield row_number, row, None
+        return
+
+    row_number = 0
+    for line in text_stream:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield row_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield row_number, None, "Each line must be a JSON object"
+            continue
+        yield row_number, row, None
+
+
+def _parse_bulk_row(row):
+    """Validate one bulk row and return the column values for insertion."""
+    required_fields = ["description", "urgency", "time_sensitive", "patient_id"]
+    missing = [field for field in required_fields if not row.get(field)]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+
+    urgency = int(row["urgency"])
+    if not (1 <= urgency <= 5):
+        raise ValueError("Urgency must be between 1 and 5")
+
+    return {
+        "patient_id": str(row["patient_id"]),
+        "description": row["description"],
+        "urgency": urgency,
+        "time_sensitive": datetime.fromisoformat(row["time_sensitive"]),
+        "status": TaskStatus.normalize(row.get("status") or QUEUED_STATUS),
+        "assigned_to": str(row["assigned_to"]) if row.get("assigned_to") else None,
+        "assigned_role": routable_role(row.get("assigned_role") or None),
+    }
+
+
+def _insert_bulk_chunk(chunk, user_id, errors):
+    """
+    Insert one chunk of parsed rows in a single transaction, queue the
+    active ones and return their task IDs. Rows for unknown patients or
+    assignees are reported in `errors`.
+    """
+    patient_ids = {values["patient_id"] for _, values in chunk}
+    known_patients = set(db.session.execute(
+        select(Patient.patient_id).where(Patient.patient_id.in_(patient_ids))
+    ).scalars())
+    assignees = {values["assigned_to"] for _, values in chunk if values["assigned_to"]}
+    known_users = set(db.session.execute(
+        select(User.emp_id).where(User.emp_id.in_(assignees))
+    ).scalars()) if assignees else set()
+
+    rows = []
+    for row_number, values in chunk:
+        if values["patient_id"] not in known_patients:
+            errors.append({"row": row_number, "error": f"Patient with ID {values['patient_id']} does not exist"})
+            continue
+        if values["assigned_to"] and values["assigned_to"] not in known_users:
+            errors.append({"row": row_number, "error": f"User with ID {values['assigned_to']} does not exist"})
+            continue
+        rows.append(values)
+    if not rows:
+        return []
+
+    # One counter update reserves IDs for the whole chunk
+    for values, task_id in zip(rows, next_string_ids(db.session.connection(), "T", len(rows))):
+        values["task_id"] = task_id
+    task_ids = [values["task_id"] for values in rows]
+
+    db.session.execute(insert(Task.__table__), rows)
+    publish_task_events(task_ids)
+    log_action(user_id, f"Bulk imported {len(rows)} tasks ({task_ids[0]}..{task_ids[-1]})")
+    db.session.commit()
+
+    current_app.task_priority_queue.push_many([
+        TaskSnapshot(**{field: values[field] for field in TaskSnapshot.__slots__})
+        for values in rows
+        if values["status"] == QUEUED_STATUS
+    ])
+    return task_ids
+
+
+@task_routes.route("/tasks/bulk", methods=["POST"])
+@role_required(*STAFF_ROLES)
+def bulk_add_tasks():
+    """
+    Import many tasks from an NDJSON (default) or CSV body, streamed in chunks.
+    Use `?format=csv` or a text/csv Content-Type for CSV with a header row.
+    Invalid rows are reported individually and do not abort the import.
+    """
+    fmt = request.args.get("format")
+    if fmt is None:
+        fmt = "csv" if request.mimetype == "text/csv" else "ndjson"
+    if fmt not in ("ndjson", "csv"):
+        return jsonify({"error": "format must be 'ndjson' or 'csv'"}), 400
+
+    user_id = get_current_user_id()
+    errors = []
+    task_ids = []
+    try:
+        chunk = []
+        for row_number, row, error in _iter_bulk_rows(request.stream, fmt):
+            if error is None:
+                try:
+                    chunk.append((row_number, _parse_bulk_row(row)))
+                except (ValueError, TypeError) as e:
+                    error = str(e)
+            if error is not None:
+                errors.append({"row": row_number, "error": error})
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                task_ids.extend(_insert_bulk_chunk(chunk, user_id, errors))
+                chunk = []
+        if chunk:
+            task_ids.extend(_insert_bulk_chunk(chunk, user_id, errors))
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e), "inserted": len(task_ids), "task_ids": task_ids, "errors": errors}), 500
+
+    status_code = 201 if task_ids else 400
+    return jsonify({"inserted": len(task_ids), "task_ids": task_ids, "errors": errors}), status_code
+
+
 @task_routes.route("/tasks/<string:task_id>", methods=["PUT"])
-@jwt_required()
+@role_required(*STAFF_ROLES)
 def update_task(task_id):
     """
     Update an existing task in the database and in-memory queue.
-    If the status is set to 'Completed', remove it from the heap but retain it in the database.
-    If the status is updated back to 'Pending', add it back to the heap.
+    Only Pending tasks stay in the heap: any other status removes the task
+    but retains it in the database, and moving back to Pending re-queues it.
+    Changing `assigned_to` or `assigned_role` moves it between sub-queues.
     """
     try:
         data = request.get_json()
@@ -187,13 +624,14 @@ def update_task(task_id):
         if not task:
             return jsonify({"error": "Task not found"}), 404
 
-        # Store the old status to handle heap logic
-        old_status = task.status
-
         # Update task attributes if provided in the request data
         task.description = data.get("description", task.description)
         task.urgency = data.get("urgency", task.urgency)
         task.status = data.get("status", task.status)
+        if "assigned_to" in data:
+            task.assigned_to = validate_assignee(data["assigned_to"])
+        if "assigned_role" in data:
+            task.assigned_role = data["assigned_role"] or None
 
         if "time_sensitive" in data:
             task.time_sensitive = datetime.fromisoformat(data["time_sensitive"])
@@ -202,24 +640,18 @@ def update_task(task_id):
         if task.urgency and not (1 <= int(task.urgency) <= 5):
             return jsonify({"error": "Urgency must be between 1 and 5"}), 400
 
-        # Commit updates to the database
+        # Log the update action and commit it together with the updates
+        user_id = get_current_user_id()
+        log_action(user_id, f"Updated task {task.task_id}")
         db.session.commit()
 
         # Handle priority queue logic based on status
-        if old_status == "Pending" and task.status == "Completed":
-            # Remove from heap if status changes to 'Completed'
-            current_app.task_priority_queue.remove(task.task_id)
-        elif old_status == "Completed" and task.status == "Pending":
-            # Add back to heap if status changes to 'Pending'
-            current_app.task_priority_queue.push(task)
-        elif task.status == "Pending":
-            # Update the heap with the modified task
-            current_app.task_priority_queue.remove(task.task_id)
+        if task.status == QUEUED_STATUS:
+            # Re-queues a task moved back to Pending; re-keys an already queued one in place
             current_app.task_priority_queue.push(task)
-
-        # Log the update action
-        user_id = get_current_user_id()
-        log_action(user_id, f"Updated task {task.task_id}")
+        else:
+            # Remove from heap once the task is In-Progress or Completed
+            current_app.task_priority_queue.discard(task.task_id)
 
         return jsonify({"message": "Task updated successfully"}), 200
     except ValueError as ve:
@@ -230,7 +662,7 @@ def update_task(task_id):
 
 
 @task_routes.route("/tasks/<string:task_id>", methods=["DELETE"])
-@jwt_required()
+@role_required(ADMINISTRATOR, DOCTOR)
 def delete_task(task_id):
     """
     Delete a task from the database and in-memory queue.
@@ -242,17 +674,14 @@ def delete_task(task_id):
         if not task:
             return jsonify({"error": "Task not found"}), 404
 
-        # Remove the task from the database
+        # Remove the task from the database and log the delete action
         db.session.delete(task)
+        user_id = get_current_user_id()
+        log_action(user_id, f"Deleted task {task.task_id}")
         db.session.commit()
 
         # Check and remove the task from the in-memory priority queue if it exists
-        if task_id in current_app.task_priority_queue.task_map:
-            current_app.task_priority_queue.remove(task_id)
-
-        # Log the delete action
-        user_id = get_current_user_id()
-        log_action(user_id, f"Deleted task {task.task_id}")
+        current_app.task_priority_queue.discard(task_id)
 
         return jsonify({"message": "Task deleted successfully"}), 200
     except Exception as e:
@@ -1,9 +1,9 @@
-from flask import request, jsonify
-from app.models.user_model import User
+from flask import request, jsonify, current_app
+from app.models.user_model import ADMINISTRATOR, User
 from app.models import db
-from werkzeug.security import generate_password_hash
-from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required
+from flask_jwt_extended import create_access_token
 from app.routes import user_routes
+from app.utils.auth import LoginBusy, role_required
 import logging
 
 # Logger setup
@@ -12,7 +12,9 @@ logger = logging.getLogger(__name__)
 @user_routes.route('/login', methods=['POST'])
 def login():
     """
-    Authenticate a user.
+    Authenticate a user. The password check runs on the login worker pool;
+    when the pool is saturated or the check times out the request is
+    refused with 503.
     """
     data = request.json
     username = data.get('username')
@@ -21,22 +23,24 @@ def login():
     if not username or not password:
         return jsonify({"error": "Username and password are required."}), 400
 
-    if (username == 'admin@gmail.com' and password == 'admin'):
-        access_token = create_access_token(identity=str(username))
-        return jsonify({"access_token": access_token, "user_id": "admin@gmail.com", "role": "Administrator"}), 200
-    else:
-        user = User.query.filter_by(email=username).first()
-        if not user or not user.check_password(password):
-            return jsonify({"error": "Invalid username or password"}), 401
+    try:
+        user = current_app.login_pipeline.authenticate(username, password)
+    except LoginBusy:
+        response = jsonify({"error": "Too many login attempts in progress, please retry."})
+        response.headers["Retry-After"] = "1"
+        return response, 503
+
+    if not user:
+        return jsonify({"error": "Invalid username or password"}), 401
 
-        # Create access token
-        access_token = create_access_token(identity=str(user.emp_id))
-        logger.info(f"User {username} logged in successfully")
-        return jsonify({"access_token": access_token, "user_id": user.email, "role": user.role}), 200
+    # Create access token
+    access_token = create_access_token(identity=str(user.emp_id))
+    logger.info(f"User {username} logged in successfully")
+    return jsonify({"access_token": access_token, "user_id": user.email, "role": user.role}), 200
 
 
 @user_routes.route('/users', methods=['GET'])
-# @jwt_required()
+@role_required(ADMINISTRATOR)
 def get_users():
     """
     Retrieve all users.
@@ -59,7 +63,7 @@ def get_users():
 
 
 @user_routes.route('/users', methods=['POST'])
-# @jwt_required()
+@role_required(ADMINISTRATOR)
 def add_user():
     """
     Add a new user.
@@ -76,7 +80,7 @@ def add_user():
         return jsonify({"error": f"User with email {email} already exists."}), 409
 
     try:
-        hashed_password = generate_password_hash(password)
+        hashed_password = current_app.login_pipeline.hash_password(password)
         new_user = User(email=email, password_hash=hashed_password, role=role)
         db.session.add(new_user)
         db.session.commit()
@@ -89,7 +93,7 @@ def add_user():
 
 
 @user_routes.route('/users/<string:email>', methods=['PUT'])
-# @jwt_required()
+@role_required(ADMINISTRATOR)
 def update_user(email):
     """
     Update user role or password.
@@ -104,9 +108,10 @@ def update_user(email):
         if "role" in data:
             user.role = data["role"]
         if "password" in data and data["password"]:
-            user.password_hash = generate_password_hash(data["password"])
+            user.password_hash = current_app.login_pipeline.hash_password(data["password"])
 
         db.session.commit()
+        current_app.login_pipeline.invalidate(user.emp_id)
         logger.info(f"User {email} updated successfully")
         return jsonify({"message": "User updated successfully"}), 200
     except Exception as e:
@@ -116,7 +121,7 @@ def update_user(email):
 
 
 @user_routes.route('/users/<string:email>', methods=['DELETE'])
-@jwt_required()
+@role_required(ADMINISTRATOR)
 def delete_user(email):
     """
     Delete a user by email.
@@ -127,8 +132,10 @@ def delete_user(email):
         return jsonify({"error": "User not found"}), 404
 
     try:
+        emp_id = user.emp_id
         db.session.delete(user)
         db.session.commit()
+        current_app.login_pipeline.invalidate(emp_id)
         logger.warning(f"User {email} deleted")
         return jsonify({"message": "User deleted successfully"}), 200
     except Exception as e:
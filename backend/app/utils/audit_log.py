@@ -0,0 +1,214 @@
+"""
+Audit log pipeline.
+
+AUDIT_LOG_MODE selects how `log_action` persists entries:
+
+- "transactional" (default): the Log row is added to the caller's
+  session and commits atomically with the business change.
+- "buffered": entries are held on the caller's session until it commits
+  (and dropped if it rolls back), then go to a bounded in-process queue
+  and a background writer inserts them in batches with one executemany
+  per flush. Entries still queued when the process dies are lost; when
+  the queue is full an entry falls back to the transactional path
+  instead of blocking.
+
+With AUDIT_LOG_RETENTION_DAYS > 0 the writer thread also rotates entries
+older than the retention window into logs_archive, at most once per
+AUDIT_LOG_ROTATE_INTERVAL seconds, so the hot logs table stays small.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import delete, event, insert, select
+from sqlalchemy.orm import Session
+from app.models import db
+from app.models.log_model import Log, LogArchive, next_log_ids
+from app.utils.background import BackgroundThread
+
+logger = logging.getLogger(__name__)
+
+
+# Entries moved to logs_archive per rotation transaction
+ROTATE_BATCH_SIZE = 5000
+
+# Session.info key for buffered entries waiting on the session's commit
+PENDING_KEY = "audit_log_pending"
+
+
+def rotate_logs(before, batch_size=ROTATE_BATCH_SIZE):
+    """
+    Move log entries older than `before` into logs_archive, oldest first,
+    one short transaction per batch. Returns how many were moved.
+    """
+    moved = 0
+    columns = [Log.log_id, Log.user_id, Log.action, Log.timestamp]
+    while True:
+        with db.engine.begin() as connection:
+            log_ids = connection.execute(
+                select(Log.log_id).where(Log.timestamp < before).order_by(Log.timestamp, Log.log_id).limit(batch_size)
+            ).scalars().all()
+            if not log_ids:
+                return moved
+            connection.execute(insert(LogArchive.__table__).from_select(
+                [column.key for column in columns], select(*columns).where(Log.log_id.in_(log_ids))
+            ))
+            connection.execute(delete(Log.__table__).where(Log.log_id.in_(log_ids)))
+        moved += len(log_ids)
+
+
+def _after_commit(session):
+    for writer, entry in session.info.pop(PENDING_KEY, ()):
+        writer.enqueue(entry)
+
+
+def _after_rollback(session):
+    session.info.pop(PENDING_KEY, None)
+
+
+def enable_session_hooks():
+    """Register the Session listeners that release buffered entries on commit."""
+    if event.contains(Session, "after_commit", _after_commit):
+        return
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_rollback", _after_rollback)
+
+
+class AuditLogWriter:
+    def __init__(self, app, mode="transactional", buffer_size=10000, batch_size=500, flush_interval=0.5,
+                 retention_days=0, rotate_interval=86400):
+        if mode not in ("transactional", "buffered"):
+            raise ValueError(f"Unknown audit log mode: {mode}")
+        self.app = app
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.rotate_interval = rotate_interval
+        self._last_rotation = None
+        self.buffer = queue.Queue(maxsize=buffer_size)
+        self._write_lock = threading.Lock()
+        self._worker = BackgroundThread(self._run, "audit-log-writer")
+
+    def log(self, user_id, action):
+        if not user_id:
+            raise ValueError("Invalid user ID")
+        if self.mode == "buffered" or self.retention_days > 0:
+            self._worker.ensure_running()
+        if self.mode == "buffered":
+            if not self.buffer.full():
+                db.session.info.setdefault(PENDING_KEY, []).append((self, {
+                    "user_id": user_id,
+                    "action": action,
+                    "timestamp": datetime.now(timezone.utc).replace(tzinfo=None),
+                }))
+                return
+            logger.warning("Audit log buffer full; writing entry synchronously")
+        db.session.add(Log(user_id=user_id, action=action))
+
+    def enqueue(self, entry):
+        """
+        Queue an entry whose transaction has committed. If the buffer
+        filled up meanwhile it is written now in its own transaction.
+        """
+        try:
+            self.buffer.put_nowait(entry)
+        except queue.Full:
+            logger.warning("Audit log buffer full; writing committed entry synchronously")
+            try:
+                self._insert([entry])
+            except Exception as e:
+                logger.error(f"Error writing audit log entry: {e}")
+
+    def _insert(self, batch):
+        with self.app.app_context():
+            with db.engine.begin() as connection:
+                for entry, log_id in zip(batch, next_log_ids(connection, len(batch))):
+                    entry["log_id"] = log_id
+                connection.execute(insert(Log.__table__), batch)
+
+    def flush(self):
+        """Write every buffered entry; return how many were written."""
+        written = 0
+        with self._write_lock:
+            while True:
+                batch = []
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self.buffer.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    return written
+                try:
+                    self._insert(batch)
+                except Exception:
+                    # Requeue what still fits so a transient error loses nothing
+                    for entry in batch:
+                        try:
+                            self.buffer.put_nowait(entry)
+                        except queue.Full:
+                            break
+                    raise
+                written += len(batch)
+
+    def rotate(self):
+        """Archive entries past the retention window; return how many were moved."""
+        self._last_rotation = time.monotonic()
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=self.retention_days)
+        with self.app.app_context():
+            moved = rotate_logs(cutoff)
+        if moved:
+            logger.info(f"Archived {moved} audit log entries older than {cutoff.isoformat()}")
+        return moved
+
+    def _rotation_due(self):
+        if self.retention_days <= 0:
+            return False
+        return self._last_rotation is None or time.monotonic() - self._last_rotation >= self.rotate_interval
+
+    def stop(self):
+        self._worker.stop()
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Error flushing audit log on shutdown: {e}")
+
+    def _run(self):
+        while not self._worker.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error writing audit log batch: {e}")
+            if self._rotation_due():
+                try:
+                    self.rotate()
+                except Exception as e:
+                    logger.error(f"Error rotating audit log: {e}")
+
+
+def init_audit_log(app):
+    writer = AuditLogWriter(
+        app,
+        mode=app.config["AUDIT_LOG_MODE"],
+        buffer_size=app.config["AUDIT_LOG_BUFFER_SIZE"],
+        flush_interval=app.config["AUDIT_LOG_FLUSH_INTERVAL"],
+        retention_days=app.config["AUDIT_LOG_RETENTION_DAYS"],
+        rotate_interval=app.config["AUDIT_LOG_ROTATE_INTERVAL"],
+    )
+    app.audit_log = writer
+    if writer.mode == "buffered":
+        enable_session_hooks()
+        atexit.register(writer.stop)
+    return writer
+
+
+def log_action(user_id, action):
+    """
+    Record a user action. The entry is only written once the caller
+    commits its session; a rollback discards it.
+    """
+    current_app.audit_log.log(user_id, action)
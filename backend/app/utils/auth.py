@@ -0,0 +1,335 @@
+"""
+Login pipeline.
+
+- Password hashes are verified on a bounded worker pool
+  (LOGIN_HASH_WORKERS threads, at most LOGIN_QUEUE_LIMIT logins admitted
+  at once), so a login burst costs a fixed amount of CPU and excess
+  attempts are turned away with 503 instead of piling up on every request
+  thread.
+- User lookups by JWT identity (emp_id) for role checks are cached in
+  an LRU (USER_CACHE_SIZE entries, each trusted for USER_CACHE_TTL
+  seconds); user updates and deletes invalidate the entry. Password
+  hashes are never cached: every login reads the hash, so a password
+  change or deleted account takes effect on the next attempt.
+- A hash made with older parameters than PASSWORD_HASH_METHOD is
+  replaced on the next successful login.
+- last_login is recorded in memory and written in batches every
+  LAST_LOGIN_FLUSH_INTERVAL seconds by a background thread.
+- Scoped tokens are short-lived JWTs for one purpose, e.g. the
+  /tasks/stream query string where EventSource cannot send headers.
+  role_required rejects them, so one leaked from a URL is useless elsewhere.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import current_app, g, jsonify
+from flask_jwt_extended import create_access_token, decode_token, get_jwt, get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt import PyJWTError
+from sqlalchemy import bindparam, select, update
+from werkzeug.security import check_password_hash, generate_password_hash
+from app.models import db
+from app.models.user_model import ADMINISTRATOR, User
+from app.utils.background import BackgroundThread
+
+logger = logging.getLogger(__name__)
+
+
+class LoginBusy(Exception):
+    """
+    Raised when the login pipeline is already at LOGIN_QUEUE_LIMIT, or the
+    password check did not finish within LOGIN_TIMEOUT.
+    """
+
+
+@dataclass(frozen=True, slots=True)
+class UserRecord:
+    """Detached copy of the user columns authorisation needs."""
+    emp_id: str
+    email: str
+    role: str
+
+
+def hash_method_prefix(password_hash):
+    """The method and parameters of a werkzeug hash, e.g. 'scrypt:32768:8:1'."""
+    return password_hash.split("$", 1)[0]
+
+
+class UserCache:
+    """LRU of UserRecords with a TTL, keyed by emp_id."""
+
+    def __init__(self, max_size=1024, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            record, cached_at = entry
+            if time.monotonic() - cached_at >= self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return record
+
+    def put(self, key, record):
+        with self._lock:
+            self._entries[key] = (record, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class LastLoginWriter:
+    """Collects last_login times and writes them in one executemany per flush."""
+
+    def __init__(self, app, flush_interval=5.0):
+        self.app = app
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._worker = BackgroundThread(self._run, "last-login-writer")
+
+    def record(self, emp_id):
+        self._worker.ensure_running()
+        with self._lock:
+            self._pending[emp_id] = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    def flush(self):
+        """Write pending last_login times; return how many users were updated."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        statement = (
+            update(User.__table__)
+            .where(User.__table__.c.emp_id == bindparam("b_emp_id"))
+            .values(last_login=bindparam("b_last_login"))
+        )
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as connection:
+                    connection.execute(statement, [
+                        {"b_emp_id": emp_id, "b_last_login": last_login} for emp_id, last_login in pending.items()
+                    ])
+        except Exception:
+            # Keep the newest time per user for the next attempt
+            with self._lock:
+                for emp_id, last_login in pending.items():
+                    self._pending.setdefault(emp_id, last_login)
+            raise
+        return len(pending)
+
+    def stop(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Error writing last_login on shutdown: {e}")
+
+    def _run(self):
+        while not self._worker.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error writing last_login batch: {e}")
+
+
+class LoginPipeline:
+    def __init__(self, app, workers=4, queue_limit=64, timeout=10.0, hash_method="scrypt",
+                 cache_size=1024, cache_ttl=300, flush_interval=5.0):
+        self.app = app
+        self.timeout = timeout
+        self.hash_method = hash_method
+        # Verified against when the email is unknown, so both paths cost one hash check
+        self._dummy_hash = generate_password_hash(os.urandom(16).hex(), method=hash_method)
+        self.hash_prefix = hash_method_prefix(self._dummy_hash)
+        self.identities = UserCache(cache_size, cache_ttl)
+        self.last_login = LastLoginWriter(app, flush_interval)
+        self._workers = workers
+        self._executor = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(queue_limit)
+
+    def authenticate(self, email, password):
+        """
+        Return the UserRecord for valid credentials, None otherwise. Raises
+        LoginBusy when too many logins are already in flight or the check
+        times out. The slot is held until the check finishes, not until the
+        request gives up on it, so timed-out checks still count as in flight.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise LoginBusy()
+        try:
+            credentials = self._credentials(email)
+            future = self._pool().submit(self._verify, credentials, password)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise LoginBusy() from None
+
+    def identity(self, emp_id):
+        """UserRecord for a JWT identity; None once the user no longer exists."""
+        record = self.identities.get(emp_id)
+        if record is not None:
+            return record
+        row = db.session.execute(select(User.emp_id, User.email, User.role).where(User.emp_id == emp_id)).first()
+        if row is None:
+            return None
+        record = UserRecord(row.emp_id, row.email, row.role)
+        self.identities.put(emp_id, record)
+        return record
+
+    def invalidate(self, emp_id):
+        self.identities.invalidate(emp_id)
+
+    @staticmethod
+    def _credentials(email):
+        """(UserRecord, password_hash) for `email`, read on every login; None when unknown."""
+        row = db.session.execute(
+            select(User.emp_id, User.email, User.role, User.password_hash).where(User.email == email)
+        ).first()
+        return (UserRecord(row.emp_id, row.email, row.role), row.password_hash) if row else None
+
+    def hash_password(self, password):
+        return generate_password_hash(password, method=self.hash_method)
+
+    def _verify(self, credentials, password):
+        if credentials is None:
+            check_password_hash(self._dummy_hash, password)
+            return None
+        record, password_hash = credentials
+        if not check_password_hash(password_hash, password):
+            return None
+        if hash_method_prefix(password_hash) != self.hash_prefix:
+            self._rehash(record, password_hash, password)
+        self.last_login.record(record.emp_id)
+        return record
+
+    def _rehash(self, record, old_hash, password):
+        """Store a hash with the current parameters, unless the password changed meanwhile."""
+        new_hash = self.hash_password(password)
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as connection:
+                    connection.execute(
+                        update(User.__table__)
+                        .where(User.__table__.c.emp_id == record.emp_id,
+                               User.__table__.c.password_hash == old_hash)
+                        .values(password_hash=new_hash)
+                    )
+            logger.info(f"Rehashed password for user {record.emp_id} with {self.hash_prefix}")
+        except Exception as e:
+            logger.error(f"Error rehashing password for user {record.emp_id}: {e}")
+
+    def _pool(self):
+        if self._executor is not None and self._pid == os.getpid():
+            return self._executor
+        with self._start_lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="login-hash")
+        return self._executor
+
+
+def current_user():
+    """UserRecord for the request's JWT identity, from the identity cache."""
+    if "current_user" not in g:
+        g.current_user = current_app.login_pipeline.identity(str(get_jwt_identity()))
+    return g.current_user
+
+
+def role_required(*roles):
+    """
+    Like @jwt_required(), but also require one of `roles`. The role comes
+    from the identity cache, so a warm check costs no database query.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request()
+            if get_jwt().get("scope"):
+                return jsonify({"error": "Token not valid for this endpoint"}), 401
+            user = current_user()
+            if user is None:
+                return jsonify({"error": "User no longer exists"}), 401
+            if user.role not in roles:
+                return jsonify({"error": f"Requires role: {', '.join(roles)}"}), 403
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def create_scoped_token(emp_id, scope, ttl):
+    """JWT for `emp_id` that only verify_scoped_token(…, scope) accepts, valid for `ttl` seconds."""
+    return create_access_token(identity=str(emp_id), expires_delta=timedelta(seconds=ttl),
+                               additional_claims={"scope": scope})
+
+
+def scoped_token_claims(token, scope):
+    """Claims of a valid, unexpired `scope` token; None otherwise."""
+    if not token:
+        return None
+    try:
+        claims = decode_token(token)
+    except (JWTExtendedException, PyJWTError):
+        return None
+    return claims if claims.get("scope") == scope else None
+
+
+def verify_scoped_token(token, scope):
+    """UserRecord for a valid, unexpired `scope` token; None otherwise."""
+    claims = scoped_token_claims(token, scope)
+    return current_app.login_pipeline.identity(str(claims["sub"])) if claims else None
+
+
+def init_login_pipeline(app):
+    pipeline = LoginPipeline(
+        app,
+        workers=app.config["LOGIN_HASH_WORKERS"],
+        queue_limit=app.config["LOGIN_QUEUE_LIMIT"],
+        timeout=app.config["LOGIN_TIMEOUT"],
+        hash_method=app.config["PASSWORD_HASH_METHOD"],
+        cache_size=app.config["USER_CACHE_SIZE"],
+        cache_ttl=app.config["USER_CACHE_TTL"],
+        flush_interval=app.config["LAST_LOGIN_FLUSH_INTERVAL"],
+    )
+    app.login_pipeline = pipeline
+    atexit.register(pipeline.last_login.stop)
+    return pipeline
+
+
+def ensure_admin_user(app):
+    """
+    Seed the administrator account (ADMIN_EMAIL / ADMIN_PASSWORD) when no
+    user with that email exists. Call inside an app context.
+    """
+    email = app.config["ADMIN_EMAIL"]
+    if User.query.filter_by(email=email).first():
+        return
+    password = app.config["ADMIN_PASSWORD"]
+    db.session.add(User(email=email, password_hash=app.login_pipeline.hash_password(password), role=ADMINISTRATOR))
+    db.session.commit()
+    if password == "admin":
+        logger.warning(f"Seeded administrator {email} with the default password; set ADMIN_PASSWORD in production.")
+    else:
+        logger.info(f"Seeded administrator {email}.")
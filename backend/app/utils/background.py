@@ -0,0 +1,54 @@
+"""
+Per-process background threads.
+
+Workers forked from a preloaded app (gunicorn --preload) inherit the
+parent's objects but none of its threads, so each background job checks
+the pid it was started in and starts again in the child. ensure_running
+is cheap enough to call from before_request.
+"""
+import os
+import threading
+
+
+class BackgroundThread:
+    """
+    A named daemon thread running `target`, started once per process.
+    `on_start` runs under the start lock just before each start, e.g. to
+    reset state that must not carry over from the parent.
+    """
+
+    def __init__(self, target, name, on_start=None):
+        self.target = target
+        self.name = name
+        self.on_start = on_start
+        self.stop_event = threading.Event()
+        self._pid = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def started(self):
+        """Whether the thread was started in this process."""
+        return self._thread is not None and self._pid == os.getpid()
+
+    def ensure_running(self):
+        """Start the thread in this process (again after a fork); True when it was started now."""
+        if self.started:
+            return False
+        with self._start_lock:
+            if self.started:
+                return False
+            self._pid = os.getpid()
+            self.stop_event = threading.Event()
+            if self.on_start is not None:
+                self.on_start()
+            self._thread = threading.Thread(target=self.target, name=self.name, daemon=True)
+            self._thread.start()
+            return True
+
+    def wait(self, timeout):
+        """Sleep up to `timeout` seconds; True once stop() was called."""
+        return self.stop_event.wait(timeout)
+
+    def stop(self):
+        self.stop_event.set()
@@ -0,0 +1,86 @@
+"""
+In-process read access to the task queue for the dashboard endpoint and
+the Dash app, so neither has to go through HTTP to get queue contents.
+
+The serialised dashboard payload is cached per queue version, so repeated
+reads of an unchanged queue reuse the same JSON body and ETag.
+"""
+import os
+import threading
+from flask import current_app
+
+_payload_cache = {}
+_payload_cache_lock = threading.Lock()
+
+
+def serialize_task(task):
+    """JSON-ready dict for a queued task snapshot."""
+    return {
+        "task_id": task.task_id,
+        "patient_id": task.patient_id,
+        "description": task.description,
+        "urgency": task.urgency,
+        "time_sensitive": task.time_sensitive.isoformat() if task.time_sensitive else None,
+        "status": task.status,
+        "assigned_to": task.assigned_to,
+        "assigned_role": task.assigned_role,
+    }
+
+
+def queue_etag(queue, version):
+    """Strong ETag for a queue version; includes the pid since forked workers share an epoch."""
+    return f"{os.getpid()}-{queue.epoch}-{version}"
+
+
+def get_dashboard_version():
+    return current_app.task_priority_queue.version
+
+
+def get_dashboard_tasks():
+    """All queued tasks in priority order."""
+    return [serialize_task(task) for _, task in current_app.task_priority_queue.ordered_tasks()]
+
+
+def get_dashboard_payload():
+    """
+    Return (version, etag, json_body) for the full dashboard, serialising
+    only when the queue version has moved since the last call.
+    """
+    queue = current_app.task_priority_queue
+    cached = _payload_cache.get(id(queue))
+    if cached and cached[0] == queue.version and cached[1] == queue_etag(queue, queue.version):
+        return cached
+    with _payload_cache_lock:
+        version, entries = queue.versioned_tasks()
+        body = current_app.json.dumps([serialize_task(task) for _, task in entries])
+        cached = (version, queue_etag(queue, version), body)
+        _payload_cache[id(queue)] = cached
+    return cached
+
+
+def get_dashboard_delta(since, epoch=None):
+    """
+    Changes after version `since` as a dict, or None when the client must
+    reload the full payload (missing or different epoch, or journal too
+    short): a version means nothing without the queue instance it is from.
+    """
+    queue = current_app.task_priority_queue
+    if epoch != queue.epoch:
+        return None
+    delta = queue.changes_since(since)
+    if delta is None:
+        return None
+    version, added, changed, removed = delta
+    return {
+        "version": version,
+        "epoch": queue.epoch,
+        "added": [serialize_task(task) for task in added],
+        "changed": [serialize_task(task) for task in changed],
+        "removed": removed,
+    }
+
+
+def get_dashboard_task(task_id):
+    """A single queued task by ID, or None; an O(1) task_map lookup."""
+    task = current_app.task_priority_queue.get(task_id)
+    return serialize_task(task) if task else None
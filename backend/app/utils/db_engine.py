@@ -0,0 +1,97 @@
+"""
+Database engine setup: SQLite connection tuning and a separate read-only
+connection pool.
+
+With SQLITE_PROFILE="production" every SQLite connection is opened in WAL
+mode with synchronous=NORMAL, a busy timeout, memory-mapped I/O, a larger
+page cache and in-memory temp tables, so readers no longer block the
+writer and concurrent writers wait instead of failing with "database is
+locked". SQLITE_PROFILE="default" leaves SQLite's own settings alone.
+
+Read-only list and export endpoints use `get_read_session()`, which draws
+from `app.read_engine`: a read-only SQLite connection pool, or for
+PostgreSQL a pool on DATABASE_READ_URL (e.g. a replica) or the primary
+with read-only transactions.
+"""
+from flask import current_app, g
+from flask_sqlalchemy.query import Query
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from app.models import db
+
+
+def engine_options(app):
+    """SQLALCHEMY_ENGINE_OPTIONS for the write engine."""
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    if not uri.startswith("sqlite"):
+        return {"pool_size": app.config["DB_WRITE_POOL_SIZE"], "pool_pre_ping": True}
+    if uri in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in uri:
+        return {}  # In-memory databases use a single static connection
+    return {"pool_size": app.config["DB_WRITE_POOL_SIZE"]}
+
+
+def _sqlite_pragmas(app, read_only=False):
+    pragmas = {
+        "busy_timeout": app.config["SQLITE_BUSY_TIMEOUT"],
+        "mmap_size": app.config["SQLITE_MMAP_SIZE"],
+        "cache_size": app.config["SQLITE_CACHE_SIZE"],
+        "temp_store": "MEMORY",
+    }
+    if read_only:
+        pragmas["query_only"] = "ON"
+    else:
+        pragmas["journal_mode"] = "WAL"
+        pragmas["synchronous"] = app.config["SQLITE_SYNCHRONOUS"]
+    return pragmas
+
+
+def _apply_pragmas(engine, pragmas):
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def _create_read_engine(app, write_engine):
+    url = write_engine.url
+    if url.get_backend_name() == "sqlite":
+        if not url.database or url.database == ":memory:":
+            return write_engine
+        read_url = url.set(database=f"file:{url.database}", query={"mode": "ro", "uri": "true"})
+        engine = create_engine(read_url, pool_size=app.config["DB_READ_POOL_SIZE"])
+        if app.config["SQLITE_PROFILE"] == "production":
+            _apply_pragmas(engine, _sqlite_pragmas(app, read_only=True))
+        return engine
+
+    options = {"pool_size": app.config["DB_READ_POOL_SIZE"], "pool_pre_ping": True}
+    if app.config["DATABASE_READ_URL"]:
+        return create_engine(app.config["DATABASE_READ_URL"], **options)
+    if url.get_backend_name() == "postgresql":
+        options["connect_args"] = {"options": "-c default_transaction_read_only=on"}
+    return create_engine(url, **options)
+
+
+def init_engines(app):
+    """Tune the write engine and attach `app.read_engine`; call after db.init_app."""
+    with app.app_context():
+        write_engine = db.engine
+        if write_engine.url.get_backend_name() == "sqlite" and app.config["SQLITE_PROFILE"] == "production":
+            _apply_pragmas(write_engine, _sqlite_pragmas(app))
+        app.read_engine = _create_read_engine(app, write_engine)
+
+    @app.teardown_appcontext
+    def close_read_session(exception=None):
+        session = g.pop("read_session", None)
+        if session is not None:
+            session.close()
+
+
+def get_read_session():
+    """Session on the read-only pool, shared for the rest of the app context."""
+    if "read_session" not in g:
+        g.read_session = Session(current_app.read_engine, query_cls=Query)
+    return g.read_session
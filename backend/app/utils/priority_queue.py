@@ -1,7 +1,24 @@
+from array import array
+from dataclasses import dataclass, fields
+from datetime import datetime
+import base64
+import contextlib
+import functools
+import gc
+import heapq
+import itertools
+import json
 import math
+import threading
+import time
+import uuid
+from collections import deque
+from app.utils.queue_aging import StaticPriority, TimingWheel
 
 
 class FibonacciHeapNode:
+    __slots__ = ("key", "value", "degree", "parent", "child", "mark", "left", "right")
+
     def __init__(self, key, value=None):
         self.key = key
         self.value = value
@@ -18,8 +35,49 @@ class FibonacciHeap:
         self.min_node = None
         self.total_nodes = 0
 
+    @classmethod
+    def from_sorted(cls, items):
+        """
+        Build a heap in O(n) from (key, value) pairs in ascending key order.
+        The nodes are shaped into binomial trees, one per set bit of n, so
+        the first extract_min has at most log2(n) roots to consolidate.
+        Returns the heap and its nodes in input order.
+        """
+        heap = cls()
+        nodes = [FibonacciHeapNode(key, value) for key, value in items]
+        start = 0
+        for order in range(len(nodes).bit_length() - 1, -1, -1):
+            if len(nodes) & (1 << order):
+                root = cls._binomial_tree(nodes, start, order)
+                if heap.min_node is None:
+                    heap.min_node = root
+                else:
+                    heap._add_to_root_list(root)
+                start += 1 << order
+        heap.total_nodes = len(nodes)
+        return heap, nodes
+
+    @staticmethod
+    def _binomial_tree(nodes, start, order):
+        # nodes[start] heads the block; the child of order j holds the next 2**j nodes
+        root = nodes[start]
+        for j in range(order):
+            child = FibonacciHeap._binomial_tree(nodes, start + (1 << j), j)
+            child.parent = root
+            if root.child is None:
+                root.child = child
+            else:
+                child.left = root.child.left
+                child.right = root.child
+                root.child.left.right = child
+                root.child.left = child
+        root.degree = order
+        return root
+
     def insert(self, key, value=None):
-        node = FibonacciHeapNode(key, value)
+        return self.insert_node(FibonacciHeapNode(key, value))
+
+    def insert_node(self, node):
         if self.min_node is None:
             self.min_node = node
         else:
@@ -32,11 +90,7 @@ class FibonacciHeap:
     def extract_min(self):
         z = self.min_node
         if z is not None:
-            if z.child:
-                children = [x for x in self._iterate(z.child)]
-                for child in children:
-                    self._add_to_root_list(child)
-                    child.parent = None
+            self._promote_children(z)
             self._remove_from_root_list(z)
             if z == z.right:
                 self.min_node = None
@@ -44,8 +98,67 @@ class FibonacciHeap:
                 self.min_node = z.right
                 self._consolidate()
             self.total_nodes -= 1
+            z.left = z.right = z
         return z
 
+    def decrease_key(self, node, new_key):
+        if new_key > node.key:
+            raise ValueError("New key is greater than the current key")
+        node.key = new_key
+        parent = node.parent
+        if parent is not None and node.key < parent.key:
+            self._cut(node, parent)
+            self._cascading_cut(parent)
+        if node.key < self.min_node.key:
+            self.min_node = node
+
+    def delete(self, node):
+        parent = node.parent
+        if parent is not None:
+            self._cut(node, parent)
+            self._cascading_cut(parent)
+        self._promote_children(node)
+        self._remove_from_root_list(node)
+        if node == node.right:
+            self.min_node = None
+        elif node is self.min_node:
+            self.min_node = node.right
+            self._consolidate()
+        self.total_nodes -= 1
+        node.left = node.right = node
+        return node
+
+    def increase_key(self, node, new_key):
+        if new_key < node.key:
+            raise ValueError("New key is smaller than the current key")
+        self.delete(node)
+        node.key = new_key
+        node.degree = 0
+        node.mark = False
+        return self.insert_node(node)
+
+    def meld(self, other):
+        if other.min_node is None:
+            return self
+        if self.min_node is None:
+            self.min_node = other.min_node
+        else:
+            self_right = self.min_node.right
+            other_left = other.min_node.left
+            self.min_node.right = other.min_node
+            other.min_node.left = self.min_node
+            self_right.left = other_left
+            other_left.right = self_right
+            if other.min_node.key < self.min_node.key:
+                self.min_node = other.min_node
+        self.total_nodes += other.total_nodes
+        other.min_node = None
+        other.total_nodes = 0
+        return self
+
+    def __len__(self):
+        return self.total_nodes
+
     def peek_min(self):
         return self.min_node.value if self.min_node else None
 
@@ -70,8 +183,43 @@ class FibonacciHeap:
             if current == stop:
                 break
 
+    def _promote_children(self, node):
+        if node.child:
+            children = [x for x in self._iterate(node.child)]
+            for child in children:
+                self._add_to_root_list(child)
+                child.parent = None
+                child.mark = False
+            node.child = None
+            node.degree = 0
+
+    def _cut(self, node, parent):
+        if node.right == node:
+            parent.child = None
+        else:
+            node.left.right = node.right
+            node.right.left = node.left
+            if parent.child == node:
+                parent.child = node.right
+        parent.degree -= 1
+        node.parent = None
+        node.mark = False
+        node.left = node.right = node
+        self._add_to_root_list(node)
+
+    def _cascading_cut(self, node):
+        parent = node.parent
+        while parent is not None:
+            if not node.mark:
+                node.mark = True
+                return
+            self._cut(node, parent)
+            node = parent
+            parent = node.parent
+
     def _consolidate(self):
-        max_degree = int(math.log(self.total_nodes, 2)) + 1
+        # Degrees are bounded by log_phi(n); 1.4405 = 1 / log2(phi).
+        max_degree = int(math.log2(max(self.total_nodes, 1)) * 1.4405) + 2
         degree_table = [None] * max_degree
         nodes = [x for x in self._iterate(self.min_node)]
         for node in nodes:
@@ -103,52 +251,1003 @@ class FibonacciHeap:
         parent.degree += 1
         child.mark = False
 
-    def get_all_nodes(self):
+    def consolidate(self):
+        """
+        Link the root list down to at most one tree per degree without
+        removing anything, so walks that start from the roots stay cheap
+        after many inserts or melds.
+        """
+        if self.min_node is not None and self.min_node.right is not self.min_node:
+            self._consolidate()
+
+    def iter_nodes(self, min_key=None):
+        """
+        Yield every node in key order without modifying the heap, or only
+        the nodes keyed at or after `min_key`. A side frontier holds the
+        roots plus the children of each node already yielded, so the first
+        k nodes cost O(r + k log k) for r roots. With `min_key`, the nodes
+        keyed before it are skipped in one plain traversal and only the
+        subtrees beyond them enter the frontier.
+        """
         if not self.min_node:
-            return []
-        return [node.value for node in self._iterate(self.min_node)]
+            return
+        counter = itertools.count()
+        frontier = [(node.key, next(counter), node) for node in self._skip_before(min_key)]
+        heapq.heapify(frontier)
+        while frontier:
+            _, _, node = heapq.heappop(frontier)
+            yield node
+            if node.child:
+                for child in self._iterate(node.child):
+                    heapq.heappush(frontier, (child.key, next(counter), child))
 
+    def _skip_before(self, min_key):
+        # Topmost nodes keyed at or after min_key; everything above them is smaller
+        if min_key is None:
+            yield from self._iterate(self.min_node)
+            return
+        stack = list(self._iterate(self.min_node))
+        while stack:
+            node = stack.pop()
+            if node.key >= min_key:
+                yield node
+            elif node.child:
+                stack.extend(self._iterate(node.child))
 
-class TaskPriorityQueue:
-    def __init__(self):
+    def get_all_nodes(self):
+        return [node.value for node in self.iter_nodes()]
+
+
+class IndexedDaryHeap:
+    """
+    d-ary min-heap stored as parallel arrays of (primary, secondary) key
+    halves and item ids, with an id -> slot index for O(log n) updates.
+    """
+
+    def __init__(self, arity=4):
+        self.arity = arity
+        self.primary = array("d")
+        self.secondary = array("d")
+        self.ids = []
+        self.index = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def key_at(self, i):
+        return (self.primary[i], self.secondary[i])
+
+    def key_of(self, item_id):
+        return self.key_at(self.index[item_id])
+
+    def peek_id(self):
+        return self.ids[0] if self.ids else None
+
+    @classmethod
+    def from_sorted(cls, items, arity=4):
+        """
+        Build a heap in O(n) from (id, key) pairs in ascending key order;
+        a sorted array already satisfies the heap property, so nothing is sifted.
+        """
+        heap = cls(arity)
+        for i, (item_id, key) in enumerate(items):
+            heap.primary.append(key[0])
+            heap.secondary.append(key[1])
+            heap.ids.append(item_id)
+            heap.index[item_id] = i
+        return heap
+
+    def insert(self, item_id, key):
+        self.primary.append(key[0])
+        self.secondary.append(key[1])
+        self.ids.append(item_id)
+        self.index[item_id] = len(self.ids) - 1
+        self._sift_up(len(self.ids) - 1)
+
+    def extend(self, items):
+        """
+        Insert many (id, key) pairs; re-heapifies in O(n) when the batch is
+        large relative to the heap instead of sifting each item up.
+        """
+        start = len(self.ids)
+        for item_id, key in items:
+            self.primary.append(key[0])
+            self.secondary.append(key[1])
+            self.ids.append(item_id)
+            self.index[item_id] = len(self.ids) - 1
+        added = len(self.ids) - start
+        if added * max(math.log2(len(self.ids) or 1), 1) > len(self.ids):
+            self._heapify()
+        else:
+            for i in range(start, len(self.ids)):
+                self._sift_up(i)
+
+    def extract_min(self):
+        item_id = self.ids[0]
+        self._remove_at(0)
+        return item_id
+
+    def delete(self, item_id):
+        self._remove_at(self.index[item_id])
+
+    def update(self, item_id, key):
+        i = self.index[item_id]
+        old_key = self.key_at(i)
+        self.primary[i] = key[0]
+        self.secondary[i] = key[1]
+        if tuple(key) < old_key:
+            self._sift_up(i)
+        else:
+            self._sift_down(i)
+
+    def iter_items(self, min_key=None):
+        """
+        Yield (key, id) in key order using a frontier over the implicit
+        tree, optionally only those keyed at or after `min_key`; slots
+        keyed before it are skipped without entering the frontier.
+        """
+        if not self.ids:
+            return
+        n = len(self.ids)
+        if min_key is None:
+            frontier = [(self.key_at(0), 0)]
+        else:
+            frontier = []
+            stack = [0]
+            while stack:
+                i = stack.pop()
+                key = self.key_at(i)
+                if key >= min_key:
+                    frontier.append((key, i))
+                    continue
+                first = i * self.arity + 1
+                stack.extend(range(first, min(first + self.arity, n)))
+            heapq.heapify(frontier)
+        while frontier:
+            key, i = heapq.heappop(frontier)
+            yield key, self.ids[i]
+            first = i * self.arity + 1
+            for child in range(first, min(first + self.arity, n)):
+                heapq.heappush(frontier, (self.key_at(child), child))
+
+    def _heapify(self):
+        for i in range((len(self.ids) - 2) // self.arity, -1, -1):
+            self._sift_down(i)
+
+    def _remove_at(self, i):
+        last = len(self.ids) - 1
+        del self.index[self.ids[i]]
+        if i != last:
+            self._place(i, self.primary[last], self.secondary[last], self.ids[last])
+        self.primary.pop()
+        self.secondary.pop()
+        self.ids.pop()
+        if i < last:
+            self._sift_up(i)
+            self._sift_down(i)
+
+    def _place(self, i, primary, secondary, item_id):
+        self.primary[i] = primary
+        self.secondary[i] = secondary
+        self.ids[i] = item_id
+        self.index[item_id] = i
+
+    def _sift_up(self, i):
+        primary, secondary, item_id = self.primary[i], self.secondary[i], self.ids[i]
+        while i > 0:
+            parent = (i - 1) // self.arity
+            if (primary, secondary) >= (self.primary[parent], self.secondary[parent]):
+                break
+            self._place(i, self.primary[parent], self.secondary[parent], self.ids[parent])
+            i = parent
+        self._place(i, primary, secondary, item_id)
+
+    def _sift_down(self, i):
+        n = len(self.ids)
+        primary, secondary, item_id = self.primary[i], self.secondary[i], self.ids[i]
+        while True:
+            first = i * self.arity + 1
+            if first >= n:
+                break
+            best = first
+            best_key = (self.primary[first], self.secondary[first])
+            for child in range(first + 1, min(first + self.arity, n)):
+                child_key = (self.primary[child], self.secondary[child])
+                if child_key < best_key:
+                    best, best_key = child, child_key
+            if best_key >= (primary, secondary):
+                break
+            self._place(i, best_key[0], best_key[1], self.ids[best])
+            i = best
+        self._place(i, primary, secondary, item_id)
+
+
+def encode_cursor(key, task_id):
+    raw = json.dumps([list(key), task_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        key, task_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return tuple(key), task_id
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+@contextlib.contextmanager
+def gc_paused():
+    """
+    Suspend the cyclic garbage collector while allocating a large batch of
+    long-lived objects; otherwise repeated collections rescan the whole
+    growing heap and dominate the build time.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def synchronized(method):
+    """Run a queue method while holding the queue's re-entrant lock."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+@dataclass(frozen=True, slots=True)
+class TaskSnapshot:
+    """
+    Immutable copy of the task columns the queue needs, so heap entries
+    never hold on to session-bound ORM instances.
+    """
+    task_id: str
+    patient_id: str
+    description: str
+    urgency: int
+    time_sensitive: datetime
+    status: str
+    assigned_to: str = None
+    assigned_role: str = None
+
+    @classmethod
+    def from_task(cls, task):
+        if isinstance(task, cls):
+            return task
+        return cls(
+            task_id=task.task_id,
+            patient_id=task.patient_id,
+            description=task.description,
+            urgency=int(task.urgency),
+            time_sensitive=task.time_sensitive,
+            status=task.status,
+            assigned_to=task.assigned_to,
+            assigned_role=task.assigned_role,
+        )
+
+    @classmethod
+    def columns(cls, model):
+        """Model columns to select when loading rows straight into snapshots."""
+        return [getattr(model, field.name) for field in fields(cls)]
+
+    @staticmethod
+    def queue_order(model):
+        """Columns that order rows the way the queue does, for bulk_load."""
+        return [model.urgency, model.time_sensitive, model.task_id]
+
+
+# Partition kinds: tasks assigned to a clinician, and tasks routed to a role
+ASSIGNEE_PARTITION = "assignee"
+ROLE_PARTITION = "role"
+
+# Role partition of tasks routed to nobody in particular
+ANY_ROLE = "*"
+
+
+def partition_of(task):
+    """
+    The one (kind, value) partition a queued task belongs to: its
+    assignee, else its routed role, else the open ANY_ROLE pool.
+    """
+    if task.assigned_to:
+        return (ASSIGNEE_PARTITION, task.assigned_to)
+    return (ROLE_PARTITION, task.assigned_role or ANY_ROLE)
+
+
+def partitions_for(emp_id, role):
+    """Partitions a clinician draws "my next task" from."""
+    return [(ASSIGNEE_PARTITION, emp_id), (ROLE_PARTITION, role), (ROLE_PARTITION, ANY_ROLE)]
+
+
+class TaskPartitions:
+    """
+    Sub-queues next to the global heap: one IndexedDaryHeap of task ids
+    per partition, plus a task_id -> partition index. The sub-heaps hold
+    only ids and keys; the TaskSnapshots stay shared in the queue's task_map.
+    """
+
+    def __init__(self, arity=4):
+        self.arity = arity
+        self.heaps = {}
+        self.index = {}
+
+    @classmethod
+    def from_sorted(cls, entries, arity=4):
+        """Build every sub-heap in O(n) from (key, task) pairs in key order."""
+        partitions = cls(arity)
+        grouped = {}
+        for key, task in entries:
+            partition = partition_of(task)
+            grouped.setdefault(partition, []).append((task.task_id, key))
+            partitions.index[task.task_id] = partition
+        partitions.heaps = {
+            partition: IndexedDaryHeap.from_sorted(items, arity) for partition, items in grouped.items()
+        }
+        return partitions
+
+    def place(self, task, key):
+        """Add a task to its partition, or move and re-key it there."""
+        partition = partition_of(task)
+        current = self.index.get(task.task_id)
+        if current == partition:
+            self.heaps[partition].update(task.task_id, key)
+            return
+        if current is not None:
+            self.discard(task.task_id)
+        heap = self.heaps.get(partition)
+        if heap is None:
+            heap = self.heaps[partition] = IndexedDaryHeap(self.arity)
+        heap.insert(task.task_id, key)
+        self.index[task.task_id] = partition
+
+    def discard(self, task_id):
+        partition = self.index.pop(task_id, None)
+        if partition is None:
+            return
+        heap = self.heaps[partition]
+        heap.delete(task_id)
+        if not heap:
+            del self.heaps[partition]
+
+    def peek(self, partition):
+        """(key, task_id) at the head of a partition, or None when it is empty."""
+        heap = self.heaps.get(partition)
+        return (heap.key_at(0), heap.ids[0]) if heap else None
+
+    def sizes(self):
+        return {partition: len(heap) for partition, heap in self.heaps.items()}
+
+
+class BaseTaskQueue:
+    """
+    Engine-independent part of the task queue: keying, ordered views and
+    serialisation. Engines provide push/push_many/get/pop/peek/remove/
+    reprioritize, bulk_load, _entry and _iter_entries, and keep `task_map`
+    keyed by task_id. Tasks are stored as TaskSnapshot instances.
+
+    Besides the global heap, every queued task sits in one of the
+    `partitions` sub-queues (its assignee, its role, or the open pool),
+    so a clinician's next task is a peek at three heap heads.
+
+    Every public operation holds `self.lock`, so one queue can be shared
+    by all request threads of a worker.
+
+    Each mutation bumps `version` and is journalled in a bounded change
+    log, which lets readers cache per version and ask for deltas, and
+    notifies `changed`. The `epoch` identifies this queue instance;
+    versions from another epoch are not comparable.
+
+    A queue can be loaded in the background with begin_warmup/warm/
+    finish_warmup while it already serves requests: any task pushed or
+    removed meanwhile is remembered, and loaded rows never overwrite it.
+    fail_warmup leaves the queue not ready until the next full rebuild.
+    bulk_load builds off-lock the same way: tasks pushed or removed while
+    it builds are replayed onto the new heap before it is swapped in.
+
+    Keys come from a priority `policy` evaluated at push time. The next
+    moment a task's key changes, or its deadline passes, is armed on
+    `wheel`; age() fires what is due, lowers those keys in place and
+    keeps the `overdue` set of queued tasks past their deadline.
+    """
+
+    def __init__(self, change_log_size=10000, policy=None):
+        self.policy = policy or StaticPriority()
+        self.wheel = TimingWheel()
+        self.overdue = set()
+        self.lock = threading.RLock()
+        self.changed = threading.Condition(self.lock)
+        self.version = 0
+        self.epoch = uuid.uuid4().hex[:12]
+        self.changes = deque(maxlen=change_log_size)
+        self.changes_floor = 0
+        self.warm_touched = None
+        self.warmup_error = None
+        self.load_touched = []
+        # Popped by a claim whose transaction has not finished yet: task_id -> number of claims
+        self.claiming = {}
+        self.partitions = TaskPartitions()
+
+    def _record_change(self, task_id, was_queued):
+        # Called after every mutation of the global heap; mirror it in the partitions
+        entry = self._entry(task_id)
+        if entry is None:
+            self.partitions.discard(task_id)
+            self.wheel.cancel(task_id)
+            self.overdue.discard(task_id)
+        else:
+            self.partitions.place(entry[1], entry[0])
+            self._schedule(self.wheel, self.overdue, entry[1], time.time())
+        self._touch(task_id)
+        self.version += 1
+        if len(self.changes) == self.changes.maxlen:
+            self.changes_floor = self.changes[0][0]
+        self.changes.append((self.version, task_id, was_queued))
+        self.changed.notify_all()
+
+    def _touch(self, task_id):
+        # Remembered for a warm-up or bulk_load in progress, whose loaded rows may predate it
+        if self.warm_touched is not None:
+            self.warm_touched.add(task_id)
+        for touched in self.load_touched:
+            touched.add(task_id)
+
+    @synchronized
+    def _begin_load(self):
+        touched = set()
+        self.load_touched.append(touched)
+        return touched
+
+    @synchronized
+    def _end_load(self, touched):
+        self.load_touched = [other for other in self.load_touched if other is not touched]
+
+    def _replay(self, latest):
+        """Re-apply {task_id: entry or None} captured from the old heap to the new one."""
+        for task_id, entry in latest.items():
+            if entry is None:
+                self.discard(task_id)
+            else:
+                self.push(entry[1])
+
+    def _reset_changes(self):
+        # A full rebuild supersedes any background warm-up still running, or one that failed
+        self.warm_touched = None
+        self.warmup_error = None
+        self.version += 1
+        self.changes.clear()
+        self.changes_floor = self.version
+        self.changed.notify_all()
+
+    @synchronized
+    def changes_since(self, version, keyed=False):
+        """
+        Return (version, added, changed, removed) for everything after
+        `version`: added/changed as TaskSnapshots (or (key, task) pairs when
+        `keyed`), removed as task IDs. Returns None when the journal no
+        longer reaches back that far.
+        """
+        if version < self.changes_floor or version > self.version:
+            return None
+        was_queued_at = {}
+        for change_version, task_id, was_queued in reversed(self.changes):
+            if change_version <= version:
+                break
+            was_queued_at[task_id] = was_queued
+        added, changed, removed = [], [], []
+        for task_id, was_queued in was_queued_at.items():
+            entry = self._entry(task_id)
+            if entry is None:
+                if was_queued:
+                    removed.append(task_id)
+                continue
+            item = entry if keyed else entry[1]
+            if was_queued:
+                changed.append(item)
+            else:
+                added.append(item)
+        return self.version, added, changed, removed
+
+    def task_key(self, task, now=None):
+        return self.policy.key(task, time.time() if now is None else now)
+
+    def _schedule(self, wheel, overdue, task, now):
+        """Arm the task's next escalation or deadline, whichever comes first."""
+        deadline = task.time_sensitive.timestamp()
+        if deadline <= now:
+            overdue.add(task.task_id)
+            fire_at = None
+        else:
+            overdue.discard(task.task_id)
+            fire_at = deadline
+        escalation = self.policy.next_escalation(task, now)
+        if escalation is not None and (fire_at is None or escalation < fire_at):
+            fire_at = escalation
+        if fire_at is None:
+            wheel.cancel(task.task_id)
+        else:
+            wheel.schedule(task.task_id, fire_at)
+
+    def _timers(self, entries, now):
+        """A fresh wheel and overdue set for (key, task) entries, for bulk_load."""
+        wheel, overdue = TimingWheel(start=now), set()
+        for _, task in entries:
+            self._schedule(wheel, overdue, task, now)
+        return wheel, overdue
+
+    @synchronized
+    def age(self, now=None):
+        """
+        Fire the timers due by `now`: lower the keys of tasks that crossed
+        an escalation threshold and mark those past their deadline as
+        overdue. Returns the number of tasks re-keyed.
+        """
+        now = time.time() if now is None else now
+        aged = 0
+        for task_id in self.wheel.advance(now):
+            entry = self._entry(task_id)
+            if entry is None:
+                continue
+            key, task = entry
+            new_key = self.task_key(task, now)
+            if new_key < key:
+                self.reprioritize(task_id, new_key)
+                aged += 1
+            # Re-arm against `now` rather than the wall clock _record_change used
+            self._schedule(self.wheel, self.overdue, task, now)
+        return aged
+
+    @synchronized
+    def overdue_tasks(self, partition=None, now=None):
+        """Queued tasks past their deadline in priority order; O(k log k) for k overdue tasks."""
+        self.age(now)
+        entries = [self._entry(task_id) for task_id in self.overdue
+                   if partition is None or self.partitions.index.get(task_id) == partition]
+        entries.sort(key=lambda entry: (entry[0], entry[1].task_id))
+        return [self._serialize(task) for _, task in entries]
+
+    @synchronized
+    def __len__(self):
+        return len(self.task_map)
+
+    @synchronized
+    def __contains__(self, task_id):
+        return task_id in self.task_map
+
+    def _split_new(self, tasks):
+        """Re-key tasks that are already queued; return the rest, deduplicated."""
+        fresh = {}
+        for task in tasks:
+            if task.task_id in self.task_map:
+                self.push(task)
+            else:
+                fresh[task.task_id] = task
+        return list(fresh.values())
+
+    @synchronized
+    def task_snapshots(self):
+        """(version, every queued TaskSnapshot unordered), copied in O(n) under the lock."""
+        return self.version, [self._entry(task_id)[1] for task_id in self.task_map]
+
+    @synchronized
+    def task_ids(self):
+        """Set of the queued task IDs at this moment."""
+        return set(self.task_map)
+
+    @synchronized
+    def pop_many(self, n, partitions=None):
+        """
+        Pop up to n tasks in priority order as one atomic step, only from
+        the given partitions when `partitions` is set.
+        """
+        tasks = []
+        while len(tasks) < n and len(self.task_map):
+            if partitions is None:
+                tasks.append(self.pop())
+                continue
+            task = self.peek_partitions(partitions)
+            if task is None:
+                break
+            self.remove(task.task_id)
+            tasks.append(task)
+        return tasks
+
+    @synchronized
+    def begin_claim(self, n, partitions=None):
+        """
+        pop_many, with the popped tasks held as in flight until end_claim,
+        so a reconcile does not take them for missing Pending tasks.
+        """
+        tasks = self.pop_many(n, partitions)
+        for task in tasks:
+            self.claiming[task.task_id] = self.claiming.get(task.task_id, 0) + 1
+        return tasks
+
+    @synchronized
+    def end_claim(self, tasks):
+        for task in tasks:
+            count = self.claiming.pop(task.task_id, 0) - 1
+            if count > 0:
+                self.claiming[task.task_id] = count
+
+    @synchronized
+    def claimed_ids(self):
+        """Task IDs popped by claims still in flight."""
+        return set(self.claiming)
+
+    @synchronized
+    def peek_partitions(self, partitions):
+        """Highest-priority task across the given partitions; one heap-head look per partition."""
+        heads = [head for head in map(self.partitions.peek, partitions) if head is not None]
+        if not heads:
+            return None
+        return self.get(min(heads)[1])
+
+    @synchronized
+    def partition_sizes(self):
+        return self.partitions.sizes()
+
+    @synchronized
+    def discard(self, task_id):
+        """Remove a task if it is queued; return whether it was."""
+        if task_id not in self.task_map:
+            self._touch(task_id)
+            return False
+        self.remove(task_id)
+        return True
+
+    def _sorted_entries(self, tasks, now):
+        """
+        (key, TaskSnapshot) pairs in (key, task_id) order, keyed at `now`.
+        Input that already arrives in that order is checked in one pass and
+        not re-sorted: with StaticPriority that is every index-ordered query
+        and snapshot. DeadlineAwarePriority lowers the keys of tasks near
+        their deadline, so its input is sorted, O(n log n) in general and
+        close to linear while few tasks are escalated.
+        """
+        entries = []
+        in_order = True
+        previous = None
+        for task in tasks:
+            task = TaskSnapshot.from_task(task)
+            position = (self.task_key(task, now), task.task_id)
+            if previous is not None and position < previous:
+                in_order = False
+            previous = position
+            entries.append((position[0], task))
+        if not in_order:
+            entries.sort(key=lambda entry: (entry[0], entry[1].task_id))
+        return entries
+
+    def rebuild_heap(self, tasks):
+        """Replace the queue contents; see bulk_load."""
+        self.bulk_load(tasks)
+
+    @property
+    def ready(self):
+        """False while a background warm-up is still loading the queue, or after it failed."""
+        return self.warm_touched is None and self.warmup_error is None
+
+    @property
+    def warming(self):
+        return self.warm_touched is not None
+
+    @synchronized
+    def begin_warmup(self):
+        # Kept when warm-up restarts in a forked worker: the tasks touched before the fork still count
+        if self.warm_touched is None:
+            self.warm_touched = set()
+        self.warmup_error = None
+
+    @synchronized
+    def warm(self, tasks):
+        """
+        Add a batch of tasks loaded from the database, skipping any task
+        changed since warm-up began. Returns False once warm-up has ended.
+        """
+        if self.warm_touched is None:
+            return False
+        touched = self.warm_touched
+        self.push_many([task for task in tasks if task.task_id not in touched and task.task_id not in self.task_map])
+        return True
+
+    @synchronized
+    def finish_warmup(self):
+        self.warm_touched = None
+        self.changed.notify_all()
+
+    @synchronized
+    def fail_warmup(self, error):
+        """Stop a warm-up that could not complete; the queue stays not ready with `error`."""
+        self.warm_touched = None
+        self.warmup_error = error
+        self.changed.notify_all()
+
+    def _iter_partition(self, partition, min_key=None):
+        heap = self.partitions.heaps.get(partition)
+        if heap is None:
+            return
+        for key, task_id in heap.iter_items(min_key):
+            yield key, self._entry(task_id)[1]
+
+    def iter_ordered(self, after=None, partition=None):
+        """
+        Yield (key, task) pairs in (key, task_id) order, optionally
+        starting strictly after a (key, task_id) position, of the whole
+        queue or of one partition. The walk seeks straight to the
+        cursor's key rather than ordering every earlier entry.
+        """
+        min_key = after[0] if after is not None else None
+        entries = self._iter_entries(min_key) if partition is None else self._iter_partition(partition, min_key)
+        group = []
+        for entry in itertools.chain(entries, [None]):
+            if group and (entry is None or entry[0] != group[0][0]):
+                group.sort(key=lambda e: e[1].task_id)
+                for key, task in group:
+                    if after is None or (key, task.task_id) > after:
+                        yield key, task
+                group = []
+            if entry is not None and (after is None or entry[0] >= after[0]):
+                group.append(entry)
+
+    @synchronized
+    def top_k(self, k):
+        return [self._serialize(task) for _, task in itertools.islice(self.iter_ordered(), k)]
+
+    @synchronized
+    def page(self, limit, cursor=None, partition=None):
+        """
+        Return up to `limit` tasks in priority order following `cursor`,
+        along with the cursor for the next page (None on the last page).
+        """
+        after = decode_cursor(cursor) if cursor else None
+        entries = list(itertools.islice(self.iter_ordered(after, partition), limit + 1))
+        next_cursor = None
+        if len(entries) > limit:
+            entries = entries[:limit]
+            key, task = entries[-1]
+            next_cursor = encode_cursor(key, task.task_id)
+        return [self._serialize(task) for _, task in entries], next_cursor
+
+    @staticmethod
+    def _serialize(task):
+        return {"task_id": task.task_id, "description": task.description, "urgency": task.urgency, "time_sensitive": task.time_sensitive,
+                "patient_id": task.patient_id, "status": task.status,
+                "assigned_to": task.assigned_to, "assigned_role": task.assigned_role}
+
+    @synchronized
+    def ordered_tasks(self):
+        """Snapshot of every (key, task) pair in priority order."""
+        return list(self.iter_ordered())
+
+    @synchronized
+    def versioned_tasks(self):
+        """(version, ordered (key, task) pairs) read atomically."""
+        return self.version, list(self.iter_ordered())
+
+    @synchronized
+    def get_all_tasks(self, partition=None):
+        return [self._serialize(task) for _, task in self.iter_ordered(partition=partition)]
+
+
+class TaskPriorityQueue(BaseTaskQueue):
+    def __init__(self, policy=None):
+        super().__init__(policy=policy)
         self.heap = FibonacciHeap()
         self.task_map = {}
 
+    @synchronized
     def push(self, task):
-        key = (task.urgency, task.time_sensitive.timestamp())
-        node = self.heap.insert(key, task)
+        if task.task_id in self.task_map:
+            self.reprioritize(task.task_id, self.task_key(task), task)
+            return
+        node = self.heap.insert(self.task_key(task), TaskSnapshot.from_task(task))
         self.task_map[task.task_id] = node
+        self._record_change(task.task_id, False)
+
+    @synchronized
+    def push_many(self, tasks):
+        """Build a heap from a batch of new tasks and meld it in O(1)."""
+        batch = FibonacciHeap()
+        for task in self._split_new(tasks):
+            node = batch.insert(self.task_key(task), TaskSnapshot.from_task(task))
+            self.task_map[task.task_id] = node
+            self._record_change(task.task_id, False)
+        self.heap.meld(batch)
+
+    @synchronized
+    def reprioritize(self, task_id, new_key, task=None):
+        if task_id not in self.task_map:
+            raise ValueError(f"Task with ID {task_id} not found in heap")
+        node = self.task_map[task_id]
+        if task is not None:
+            node.value = TaskSnapshot.from_task(task)
+        if new_key < node.key:
+            self.heap.decrease_key(node, new_key)
+        elif new_key > node.key:
+            self.heap.increase_key(node, new_key)
+        self._record_change(task_id, True)
 
+    @synchronized
+    def get(self, task_id):
+        node = self.task_map.get(task_id)
+        return node.value if node else None
+
+    def _entry(self, task_id):
+        node = self.task_map.get(task_id)
+        return (node.key, node.value) if node else None
+
+    @synchronized
     def pop(self):
         if not self.heap.min_node:
             raise IndexError("No tasks in the queue")
         min_node = self.heap.extract_min()
         task = min_node.value
         del self.task_map[task.task_id]
+        self._record_change(task.task_id, True)
         return task
 
+    @synchronized
     def peek(self):
         if not self.heap.min_node:
             return None
         return self.heap.peek_min()
 
+    @synchronized
     def remove(self, task_id):
         if task_id in self.task_map:
-            node = self.task_map[task_id]
-            self.heap.decrease_key(node, float('-inf'))  # Move the node to the top
-            self.heap.extract_min()  # Remove the node from the heap
-            del self.task_map[task_id]
+            node = self.task_map.pop(task_id)
+            self.heap.delete(node)
+            self._record_change(task_id, True)
         else:
             raise ValueError(f"Task with ID {task_id} not found in heap")
 
-    def rebuild_heap(self, tasks):
-        self.heap = FibonacciHeap()
+    def bulk_load(self, tasks):
+        """
+        Replace the queue contents; O(n) for tasks already in key order (see
+        _sorted_entries). The new heap is built without the lock and swapped
+        in at once, so readers never see a partial queue; tasks pushed or
+        removed during the build keep their current state.
+        """
+        now = time.time()
+        touched = self._begin_load()
+        try:
+            with gc_paused():
+                entries = self._sorted_entries(tasks, now)
+                heap, nodes = FibonacciHeap.from_sorted(entries)
+                task_map = {node.value.task_id: node for node in nodes}
+                partitions = TaskPartitions.from_sorted(entries)
+                wheel, overdue = self._timers(entries, now)
+            with self.lock:
+                self._end_load(touched)
+                latest = {task_id: self._entry(task_id) for task_id in touched}
+                self.heap, self.task_map, self.partitions = heap, task_map, partitions
+                self.wheel, self.overdue = wheel, overdue
+                self._reset_changes()
+                self._replay(latest)
+        finally:
+            self._end_load(touched)
+
+    def _iter_entries(self, min_key=None):
+        # Consolidating first keeps the walk O(log n + k log k) after batches of inserts or melds
+        self.heap.consolidate()
+        for node in self.heap.iter_nodes(min_key):
+            yield node.key, node.value
+
+
+class CompactTaskPriorityQueue(BaseTaskQueue):
+    """
+    Array-backed engine: keys and task ids live in an IndexedDaryHeap and
+    `task_map` holds only task_id -> TaskSnapshot.
+    """
+
+    def __init__(self, arity=4, policy=None):
+        super().__init__(policy=policy)
+        self.arity = arity
+        self.heap = IndexedDaryHeap(arity)
         self.task_map = {}
-        for task in tasks:
-            self.push(task)
 
-    def get_all_tasks(self):
-        return [{"task_id": node.task_id, "description": node.description, "urgency": node.urgency, "time_sensitive": node.time_sensitive,
-                "patient_id": node.patient_id, "status": node.status}
-                for node in self.heap.get_all_nodes()]
+    @synchronized
+    def push(self, task):
+        if task.task_id in self.task_map:
+            self.reprioritize(task.task_id, self.task_key(task), task)
+            return
+        self.heap.insert(task.task_id, self.task_key(task))
+        self.task_map[task.task_id] = TaskSnapshot.from_task(task)
+        self._record_change(task.task_id, False)
+
+    @synchronized
+    def push_many(self, tasks):
+        """Append a batch of new tasks and restore heap order once."""
+        batch = []
+        for task in self._split_new(tasks):
+            self.task_map[task.task_id] = TaskSnapshot.from_task(task)
+            batch.append((task.task_id, self.task_key(task)))
+        self.heap.extend(batch)
+        for task_id, _ in batch:
+            self._record_change(task_id, False)
+
+    @synchronized
+    def reprioritize(self, task_id, new_key, task=None):
+        if task_id not in self.task_map:
+            raise ValueError(f"Task with ID {task_id} not found in heap")
+        if task is not None:
+            self.task_map[task_id] = TaskSnapshot.from_task(task)
+        self.heap.update(task_id, new_key)
+        self._record_change(task_id, True)
+
+    @synchronized
+    def get(self, task_id):
+        return self.task_map.get(task_id)
+
+    def _entry(self, task_id):
+        task = self.task_map.get(task_id)
+        return (self.heap.key_of(task_id), task) if task else None
+
+    @synchronized
+    def pop(self):
+        if not self.heap.ids:
+            raise IndexError("No tasks in the queue")
+        task = self.task_map.pop(self.heap.extract_min())
+        self._record_change(task.task_id, True)
+        return task
+
+    @synchronized
+    def peek(self):
+        task_id = self.heap.peek_id()
+        return self.task_map[task_id] if task_id is not None else None
+
+    @synchronized
+    def remove(self, task_id):
+        if task_id in self.task_map:
+            self.heap.delete(task_id)
+            del self.task_map[task_id]
+            self._record_change(task_id, True)
+        else:
+            raise ValueError(f"Task with ID {task_id} not found in heap")
+
+    def bulk_load(self, tasks):
+        """
+        Replace the queue contents; O(n) for tasks already in key order (see
+        _sorted_entries). Built off-lock and swapped in at once, with tasks
+        touched during the build replayed as in TaskPriorityQueue.bulk_load.
+        """
+        now = time.time()
+        touched = self._begin_load()
+        try:
+            with gc_paused():
+                entries = self._sorted_entries(tasks, now)
+                heap = IndexedDaryHeap.from_sorted(((task.task_id, key) for key, task in entries), self.arity)
+                task_map = {task.task_id: task for _, task in entries}
+                partitions = TaskPartitions.from_sorted(entries, self.arity)
+                wheel, overdue = self._timers(entries, now)
+            with self.lock:
+                self._end_load(touched)
+                latest = {task_id: self._entry(task_id) for task_id in touched}
+                self.heap, self.task_map, self.partitions = heap, task_map, partitions
+                self.wheel, self.overdue = wheel, overdue
+                self._reset_changes()
+                self._replay(latest)
+        finally:
+            self._end_load(touched)
+
+    def _iter_entries(self, min_key=None):
+        for key, task_id in self.heap.iter_items(min_key):
+            yield key, self.task_map[task_id]
+
+
+QUEUE_ENGINES = {
+    "fibonacci": TaskPriorityQueue,
+    "dary": CompactTaskPriorityQueue,
+}
+
 
+def create_task_queue(engine="fibonacci", policy=None):
+    """Instantiate the task queue engine named by TASK_QUEUE_ENGINE, keyed by `policy`."""
+    if engine not in QUEUE_ENGINES:
+        raise ValueError(f"Unknown task queue engine: {engine}")
+    return QUEUE_ENGINES[engine](policy=policy)
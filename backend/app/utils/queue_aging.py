@@ -0,0 +1,233 @@
+"""
+Deadline-aware aging of task queue keys.
+
+A priority policy turns a task into its queue key at a given time.
+StaticPriority keeps the original (urgency, deadline) key for as long as
+the task is queued; DeadlineAwarePriority caps the urgency more tightly
+as the deadline nears, so a low-urgency task about to breach overtakes
+fresh urgent work, and an overdue task outranks everything on time.
+
+A policy also says when a task's key next changes. The queue schedules
+that moment on a hierarchical TimingWheel, and a ticker thread advances
+the wheel and re-keys only the tasks that are due, with decrease_key,
+instead of rebuilding the heap periodically.
+"""
+import logging
+import math
+import time
+from app.utils.background import BackgroundThread
+
+logger = logging.getLogger(__name__)
+
+# Urgency cap of a task past its deadline; valid urgencies start at 1
+OVERDUE_URGENCY = 0
+
+# (seconds before the deadline, urgency cap): 4h -> 3, 1h -> 2, 15min -> 1, overdue -> 0
+DEFAULT_ESCALATIONS = ((14400, 3), (3600, 2), (900, 1), (0, OVERDUE_URGENCY))
+
+
+def parse_escalations(spec):
+    """Parse TASK_ESCALATIONS, e.g. "14400:3,3600:2,900:1,0:0", into (seconds, cap) pairs."""
+    escalations = []
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        try:
+            window, cap = part.split(":")
+            escalations.append((float(window), int(cap)))
+        except ValueError as e:
+            raise ValueError(f"Invalid escalation {part!r}; expected <seconds>:<urgency>") from e
+    return tuple(escalations)
+
+
+class StaticPriority:
+    """(urgency, deadline), fixed when the task is queued."""
+
+    def key(self, task, now):
+        return (int(task.urgency), task.time_sensitive.timestamp())
+
+    def next_escalation(self, task, now):
+        return None
+
+
+class DeadlineAwarePriority:
+    """
+    (urgency, deadline) where the urgency is capped by every escalation
+    window the task has entered: with the defaults an urgency-5 task is
+    treated as urgency 3 four hours before its deadline, 1 at fifteen
+    minutes, and 0 once overdue. Keys only ever decrease over time.
+    """
+
+    def __init__(self, escalations=DEFAULT_ESCALATIONS):
+        # Widest window first, i.e. in the order the thresholds are reached
+        self.escalations = sorted(escalations, reverse=True)
+
+    def key(self, task, now):
+        deadline = task.time_sensitive.timestamp()
+        urgency = int(task.urgency)
+        remaining = deadline - now
+        for window, cap in self.escalations:
+            if remaining <= window:
+                urgency = min(urgency, cap)
+        return (urgency, deadline)
+
+    def next_escalation(self, task, now):
+        """Time of the next threshold that lowers the task's key, or None."""
+        deadline = task.time_sensitive.timestamp()
+        urgency = self.key(task, now)[0]
+        for window, cap in self.escalations:
+            at = deadline - window
+            if at > now and cap < urgency:
+                return at
+        return None
+
+
+PRIORITY_POLICIES = {
+    "static": StaticPriority,
+    "deadline": DeadlineAwarePriority,
+}
+
+
+def create_priority_policy(name="static", escalations=None):
+    """Instantiate the priority policy named by TASK_PRIORITY_POLICY."""
+    if name not in PRIORITY_POLICIES:
+        raise ValueError(f"Unknown task priority policy: {name}")
+    if name == "deadline" and escalations:
+        return DeadlineAwarePriority(parse_escalations(escalations) if isinstance(escalations, str) else escalations)
+    return PRIORITY_POLICIES[name]()
+
+
+class TimingWheel:
+    """
+    Hierarchical timing wheel of one pending timer per item. Level l has
+    `slots` buckets of slots**l ticks each; a timer sits on the lowest
+    level whose current rotation contains it and cascades one level down
+    when its bucket comes round, so scheduling, cancelling and firing are
+    O(levels) per timer. Timers beyond the top level wait in an overflow
+    list that is re-placed once per top-level rotation.
+    """
+
+    def __init__(self, tick=1.0, slots=64, levels=4, start=None):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.current = int((time.time() if start is None else start) // tick)
+        self.wheels = [[[] for _ in range(slots)] for _ in range(levels)]
+        self.overflow = []
+        self.ready = []
+        # item -> tick of its live timer; bucket entries that disagree are stale
+        self.pending = {}
+
+    def __len__(self):
+        return len(self.pending)
+
+    def __contains__(self, item):
+        return item in self.pending
+
+    def schedule(self, item, when):
+        """(Re)arm the item's timer to fire at the first tick at or after `when`."""
+        tick = math.ceil(when / self.tick)
+        if self.pending.get(item) == tick:
+            return
+        self.pending[item] = tick
+        self._place(tick, item)
+
+    def cancel(self, item):
+        self.pending.pop(item, None)
+
+    def advance(self, now=None):
+        """Move the wheel up to `now` and return the items whose timers fired."""
+        target = int((time.time() if now is None else now) // self.tick)
+        due = self._drain_ready()
+        while self.current < target:
+            if not self.pending:
+                # Nothing armed: jump ahead and drop any stale entries
+                self.current = target
+                self.wheels = [[[] for _ in range(self.slots)] for _ in range(self.levels)]
+                self.overflow = []
+                break
+            self.current += 1
+            self._cascade()
+            index = self.current % self.slots
+            bucket = self.wheels[0][index]
+            if bucket:
+                self.wheels[0][index] = []
+                due.extend(self._fire(bucket))
+            due.extend(self._drain_ready())
+        return due
+
+    def _place(self, tick, item):
+        if tick <= self.current:
+            self.ready.append((tick, item))
+            return
+        span = 1
+        for level in range(self.levels):
+            rotation = span * self.slots
+            if tick // rotation == self.current // rotation:
+                self.wheels[level][(tick // span) % self.slots].append((tick, item))
+                return
+            span = rotation
+        self.overflow.append((tick, item))
+
+    def _cascade(self):
+        # Highest level first, so its timers can land in lower buckets due now
+        top = 0
+        span = self.slots
+        while top < self.levels and self.current % span == 0:
+            top += 1
+            span *= self.slots
+        for level in range(top, 0, -1):
+            if level == self.levels:
+                entries, self.overflow = self.overflow, []
+            else:
+                index = (self.current // self.slots ** level) % self.slots
+                entries, self.wheels[level][index] = self.wheels[level][index], []
+            for tick, item in entries:
+                if self.pending.get(item) == tick:
+                    self._place(tick, item)
+
+    def _drain_ready(self):
+        if not self.ready:
+            return []
+        entries, self.ready = self.ready, []
+        return self._fire(entries)
+
+    def _fire(self, entries):
+        fired = []
+        for tick, item in entries:
+            if self.pending.get(item) == tick:
+                del self.pending[item]
+                fired.append(item)
+        return fired
+
+
+class QueueAgingTimer:
+    """Advances the task queue's timing wheel every `interval` seconds."""
+
+    def __init__(self, app, interval=1.0):
+        self.app = app
+        self.interval = interval
+        self._worker = BackgroundThread(self._run, "queue-aging")
+
+    def ensure_running(self):
+        """Start the aging thread in this process (again after a fork)."""
+        self._worker.ensure_running()
+
+    def stop(self):
+        self._worker.stop()
+
+    def _run(self):
+        while not self._worker.wait(self.interval):
+            try:
+                self.app.task_priority_queue.age()
+            except Exception as e:
+                logger.error(f"Error aging task queue: {e}")
+
+
+def start_queue_aging(app):
+    """Start advancing the queue's timing wheel in the background."""
+    timer = QueueAgingTimer(app, interval=app.config["QUEUE_AGING_INTERVAL"])
+    app.queue_aging_timer = timer
+    app.before_request(timer.ensure_running)
+    timer.ensure_running()
+    return timer
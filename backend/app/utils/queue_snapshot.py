@@ -0,0 +1,222 @@
+"""
+Binary snapshots of the task queue for fast warm restarts.
+
+A snapshot holds every queued TaskSnapshot in queue order, column by
+column: a fixed header, int32 urgencies, int64 deadlines in microseconds,
+then each string column as n + 1 int64 character offsets, n null flags
+and one UTF-8 blob. Loading maps the file, copies the columns
+straight into arrays and decodes each blob once, so no row is read from
+the database.
+
+The header records a tasks.updated_at watermark up to which the captured
+queue is known to match the database. With QUEUE_SYNC_MODE=eventlog that
+is the database watermark, read just before catching up on every queue
+event. A local queue does not see other workers' writes, so it only
+vouches for the watermark of its own last load or /tasks/sync. After
+loading, reconcile_queue re-reads only the rows updated since then and
+scans the Pending IDs to drop deleted tasks, which brings the restored
+queue in line with the database.
+
+Keys are not stored: they are recomputed by the queue's priority policy
+on load, since deadline-aware keys depend on the time.
+"""
+import atexit
+import itertools
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from array import array
+from datetime import datetime, timedelta
+from app.utils.background import BackgroundThread
+from app.utils.priority_queue import TaskSnapshot
+from app.utils.queue_sync import queue_watermark
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"TQSN"
+FORMAT_VERSION = 1
+
+# magic, format version, task count, database fingerprint, watermark (us, or NO_WATERMARK)
+HEADER = struct.Struct("<4sHIIq")
+BLOB_LENGTH = struct.Struct("<Q")
+NO_WATERMARK = -1
+
+# TaskSnapshot string columns, in file order
+STRING_FIELDS = ("task_id", "patient_id", "description", "status", "assigned_to", "assigned_role")
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def to_micros(value):
+    return (value.replace(tzinfo=None) - EPOCH) // MICROSECOND
+
+
+def from_micros(value):
+    return EPOCH + timedelta(microseconds=value)
+
+
+def database_fingerprint(uri):
+    """Tie a snapshot to the database it was taken from."""
+    return zlib.crc32(uri.encode())
+
+
+def _string_column(values):
+    nulls = array("B", (value is None for value in values))
+    values = ["" if value is None else value for value in values]
+    offsets = array("q", itertools.accumulate(map(len, values), initial=0))
+    blob = "".join(values).encode()
+    return offsets.tobytes() + nulls.tobytes() + BLOB_LENGTH.pack(len(blob)) + blob
+
+
+def write_snapshot(path, tasks, watermark, fingerprint):
+    """
+    Write TaskSnapshots to `path` in queue order. The file is written
+    beside the target and renamed over it, so readers never see half of it.
+    """
+    tasks = sorted(tasks, key=lambda task: (task.urgency, task.time_sensitive, task.task_id))
+    urgencies = array("i", (task.urgency for task in tasks))
+    deadlines = array("q", (to_micros(task.time_sensitive) for task in tasks))
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(tasks), fingerprint,
+                         NO_WATERMARK if watermark is None else to_micros(watermark))
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(urgencies.tobytes())
+        f.write(deadlines.tobytes())
+        for field in STRING_FIELDS:
+            f.write(_string_column([getattr(task, field) for task in tasks]))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(tasks)
+
+
+def _read_array(buffer, offset, typecode, count):
+    column = array(typecode)
+    end = offset + column.itemsize * count
+    if end > len(buffer):
+        raise ValueError("Truncated queue snapshot")
+    column.frombytes(buffer[offset:end])
+    return column, end
+
+
+def _read_strings(buffer, offset, count):
+    offsets, offset = _read_array(buffer, offset, "q", count + 1)
+    nulls, offset = _read_array(buffer, offset, "B", count)
+    if offset + BLOB_LENGTH.size > len(buffer):
+        raise ValueError("Truncated queue snapshot")
+    (blob_length,) = BLOB_LENGTH.unpack_from(buffer, offset)
+    offset += BLOB_LENGTH.size
+    blob = buffer[offset:offset + blob_length]
+    if len(blob) != blob_length:
+        raise ValueError("Truncated queue snapshot")
+    text = blob.decode()
+    values = [text[start:end] for start, end in zip(offsets, offsets[1:])]
+    if nulls.count(1):
+        values = [None if null else value for value, null in zip(values, nulls)]
+    return values, offset + blob_length
+
+
+def read_snapshot(path, fingerprint):
+    """
+    Return (watermark, TaskSnapshots in queue order) from `path`. Raises
+    ValueError when the file is not a snapshot of this format and database.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        if len(buffer) < HEADER.size:
+            raise ValueError("Truncated queue snapshot")
+        magic, version, count, file_fingerprint, watermark = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported queue snapshot format in {path}")
+        if file_fingerprint != fingerprint:
+            raise ValueError(f"Queue snapshot {path} was taken from another database")
+        offset = HEADER.size
+        urgencies, offset = _read_array(buffer, offset, "i", count)
+        deadlines, offset = _read_array(buffer, offset, "q", count)
+        columns = []
+        for _ in STRING_FIELDS:
+            values, offset = _read_strings(buffer, offset, count)
+            columns.append(values)
+    task_ids, patient_ids, descriptions, statuses, assignees, roles = columns
+    deadlines = [EPOCH + timedelta(microseconds=deadline) for deadline in deadlines]
+    # Positional arguments in TaskSnapshot field order; keywords cost noticeably more per row
+    tasks = list(itertools.starmap(TaskSnapshot, zip(
+        task_ids, patient_ids, descriptions, urgencies, deadlines, statuses, assignees, roles)))
+    return (None if watermark == NO_WATERMARK else from_micros(watermark)), tasks
+
+
+class QueueSnapshotWriter:
+    """
+    Writes the task queue to its snapshot file every `interval` seconds
+    when it has changed, and once more when the process exits.
+    """
+
+    def __init__(self, app, path, interval=300):
+        self.app = app
+        self.path = path
+        self.interval = interval
+        self.fingerprint = database_fingerprint(app.config["SQLALCHEMY_DATABASE_URI"])
+        self.written_version = None
+        self._write_lock = threading.Lock()
+        self._worker = BackgroundThread(self._run, "queue-snapshot")
+
+    def ensure_running(self):
+        """Start the snapshot thread in this process (again after a fork)."""
+        self._worker.ensure_running()
+
+    def stop(self):
+        self._worker.stop()
+
+    def _run(self):
+        while not self._worker.wait(self.interval):
+            try:
+                self.write()
+            except Exception as e:
+                logger.error(f"Error writing queue snapshot: {e}")
+
+    def write(self):
+        """Snapshot the queue if it changed since the last write; return the tasks written, or None."""
+        queue = self.app.task_priority_queue
+        if not queue.ready:
+            return None
+        with self._write_lock:
+            watermark = self.watermark()
+            version, tasks = queue.task_snapshots()
+            if (queue.epoch, version) == self.written_version:
+                return None
+            written = write_snapshot(self.path, tasks, watermark, self.fingerprint)
+            self.written_version = (queue.epoch, version)
+        logger.info(f"Wrote queue snapshot of {written} tasks to {self.path}.")
+        return written
+
+    def watermark(self):
+        """tasks.updated_at up to which the queue, captured next, matches the database."""
+        tailer = getattr(self.app, "queue_event_tailer", None)
+        if tailer is None:
+            return self.app.task_sync_watermark
+        with self.app.app_context():
+            # Read before catching up, so every write stamped up to it has had its event applied
+            watermark = queue_watermark()
+            tailer.poll()
+        return watermark
+
+    def write_on_exit(self):
+        try:
+            self.write()
+        except Exception as e:
+            logger.error(f"Error writing queue snapshot on exit: {e}")
+
+
+def start_queue_snapshots(app):
+    """Write the queue snapshot periodically and at exit, per QUEUE_SNAPSHOT_PATH."""
+    writer = QueueSnapshotWriter(app, app.config["QUEUE_SNAPSHOT_PATH"], interval=app.config["QUEUE_SNAPSHOT_INTERVAL"])
+    app.queue_snapshot_writer = writer
+    app.before_request(writer.ensure_running)
+    atexit.register(writer.write_on_exit)
+    writer.ensure_running()
+    return writer
@@ -0,0 +1,251 @@
+"""
+Cross-worker propagation of task queue mutations, and reconciliation of
+a queue against the database.
+
+Each worker process keeps its own in-memory queue. With QUEUE_SYNC_MODE
+set to "eventlog", every insert, update or delete of a Task also appends
+a row to `queue_events` inside the same transaction, and a background
+thread in every worker tails that table and re-reads the affected tasks
+into its local queue. Event ids are assigned under SQLite's single
+writer lock, so tailing by id never skips a committed event. That does
+not hold on PostgreSQL, where sequence values are taken before commit
+and can become visible out of order, so eventlog mode is SQLite-only.
+
+`reconcile_queue` is the on-demand counterpart used by /tasks/sync: it
+diffs the queue against the database instead of rebuilding it.
+"""
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event, insert, select, delete
+from app.models import db
+from app.models.task_model import QUEUED_STATUS, Task, is_queued
+from app.models.queue_event_model import QueueEvent
+from app.utils.background import BackgroundThread
+from app.utils.priority_queue import TaskSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Bound on the number of ids sent in one IN (...) lookup
+LOOKUP_CHUNK_SIZE = 500
+
+# How far before its watermark reconcile_queue re-reads tasks.updated_at
+WATERMARK_OVERLAP = timedelta(seconds=1)
+
+
+def worker_origin():
+    """Identify the current worker process; evaluated lazily so forks differ."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _record_event(connection, task_id, op):
+    connection.execute(
+        insert(QueueEvent.__table__).values(task_id=task_id, op=op, origin=worker_origin())
+    )
+
+
+def _after_task_upsert(mapper, connection, target):
+    _record_event(connection, target.task_id, "upsert")
+
+
+def _after_task_delete(mapper, connection, target):
+    _record_event(connection, target.task_id, "delete")
+
+
+def publish_task_events(task_ids, op="upsert"):
+    """
+    Record events for task writes that bypass the mapper listeners, such
+    as bulk UPDATE statements, in the current session's transaction.
+    """
+    if not task_ids or not event.contains(Task, "after_insert", _after_task_upsert):
+        return
+    origin = worker_origin()
+    db.session.execute(
+        insert(QueueEvent.__table__),
+        [{"task_id": task_id, "op": op, "origin": origin} for task_id in task_ids],
+    )
+
+
+def enable_event_log():
+    """Register the Task mapper listeners that append to queue_events."""
+    if event.contains(Task, "after_insert", _after_task_upsert):
+        return
+    event.listen(Task, "after_insert", _after_task_upsert)
+    event.listen(Task, "after_update", _after_task_upsert)
+    event.listen(Task, "after_delete", _after_task_delete)
+
+
+class QueueEventTailer:
+    """
+    Polls queue_events for rows written by other workers and applies the
+    current DB state of those tasks to this worker's queue.
+    """
+
+    def __init__(self, app, interval=0.2, retention=3600):
+        self.app = app
+        self.interval = interval
+        self.retention = retention
+        self.last_event_id = 0
+        self.origin = None
+        self._worker = BackgroundThread(self._run, "queue-event-tailer", on_start=self._set_origin)
+        self._poll_lock = threading.Lock()
+        self._polls = 0
+
+    def mark_position(self):
+        """Start tailing after the newest event; call before loading the queue."""
+        result = db.session.execute(select(db.func.max(QueueEvent.event_id))).scalar()
+        self.last_event_id = result or 0
+
+    def ensure_running(self):
+        """Start the tailing thread in this process (again after a fork)."""
+        self._worker.ensure_running()
+
+    def stop(self):
+        self._worker.stop()
+
+    def _set_origin(self):
+        self.origin = worker_origin()
+
+    def _run(self):
+        while not self._worker.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    self.poll()
+            except Exception as e:
+                logger.error(f"Error tailing queue events: {e}")
+
+    def poll(self):
+        """Apply all new foreign events; return the number of tasks refreshed."""
+        # Also called by the snapshot writer to catch up before a snapshot
+        with self._poll_lock:
+            return self._poll()
+
+    def _poll(self):
+        rows = db.session.execute(
+            select(QueueEvent.event_id, QueueEvent.task_id, QueueEvent.origin)
+            .where(QueueEvent.event_id > self.last_event_id)
+            .order_by(QueueEvent.event_id)
+        ).all()
+        self._polls += 1
+        if self._polls % 300 == 0:
+            self.prune()
+        if not rows:
+            return 0
+        self.last_event_id = rows[-1].event_id
+        task_ids = list({row.task_id for row in rows if row.origin != self.origin})
+        if task_ids:
+            self.apply(task_ids)
+        return len(task_ids)
+
+    def apply(self, task_ids):
+        """Bring the given tasks in the local queue in line with the database."""
+        queue = self.app.task_priority_queue
+        columns = TaskSnapshot.columns(Task)
+        for start in range(0, len(task_ids), LOOKUP_CHUNK_SIZE):
+            chunk = task_ids[start:start + LOOKUP_CHUNK_SIZE]
+            rows = {
+                row.task_id: row
+                for row in db.session.execute(select(*columns).where(Task.task_id.in_(chunk)))
+            }
+            for task_id in chunk:
+                row = rows.get(task_id)
+                if row is None or row.status != QUEUED_STATUS:
+                    queue.discard(task_id)
+                else:
+                    queue.push(row)
+
+    def prune(self):
+        """
+        Drop events older than the retention window, always keeping the
+        newest one: tables created without AUTOINCREMENT would otherwise
+        reuse low event ids once empty, below every worker's position.
+        """
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=self.retention)
+        newest = select(db.func.max(QueueEvent.event_id)).scalar_subquery()
+        db.session.execute(delete(QueueEvent).where(QueueEvent.created_at < cutoff, QueueEvent.event_id < newest))
+        db.session.commit()
+
+
+def queue_watermark():
+    """Latest tasks.updated_at; reconcile_queue picks up from here."""
+    return db.session.execute(select(db.func.max(Task.updated_at))).scalar()
+
+
+def reconcile_queue(queue, since, scan=False):
+    """
+    Bring a loaded queue in line with the database, touching only what
+    differs. Tasks updated at or after `since` (less WATERMARK_OVERLAP)
+    are re-read and pushed or discarded when their snapshot changed. With
+    `scan`, the queued IDs are then diffed against every Pending ID in the
+    database (an O(n) scan of idx_task_queued) to catch deletes and writes
+    that bypass updated_at. Tasks popped by a claim still in flight are
+    left alone either way.
+    Returns (new watermark, number of tasks changed in the queue).
+    """
+    columns = TaskSnapshot.columns(Task)
+    watermark = since
+    touched = 0
+
+    # Each worker stamps updated_at itself before committing, so a row can commit
+    # after a newer stamp was read; re-read a margin before the watermark, and
+    # skip the unchanged snapshots below
+    recheck_from = since - WATERMARK_OVERLAP if since is not None else None
+    rows = db.session.execute(
+        select(*columns, Task.updated_at).where(Task.updated_at >= recheck_from)
+        .execution_options(yield_per=LOOKUP_CHUNK_SIZE)
+    )
+    for row in rows:
+        if row.updated_at is not None and (watermark is None or row.updated_at > watermark):
+            watermark = row.updated_at
+        if row.status != QUEUED_STATUS:
+            touched += queue.discard(row.task_id)
+            continue
+        if row.task_id in queue.claiming:
+            continue
+        snapshot = TaskSnapshot.from_task(row)
+        if queue.get(row.task_id) != snapshot:
+            queue.push(snapshot)
+            touched += 1
+
+    if not scan:
+        return watermark, touched
+
+    # Snapshot the queue before reading the database so tasks queued meanwhile are not evicted
+    queued_ids = queue.task_ids() | queue.claimed_ids()
+    pending_ids = set(db.session.execute(select(Task.task_id).where(is_queued())).scalars())
+    for task_id in queued_ids - pending_ids:
+        touched += queue.discard(task_id)
+    missing = list(pending_ids - queued_ids)
+    for start in range(0, len(missing), LOOKUP_CHUNK_SIZE):
+        chunk = missing[start:start + LOOKUP_CHUNK_SIZE]
+        snapshots = [
+            TaskSnapshot.from_task(row)
+            for row in db.session.execute(select(*columns).where(Task.task_id.in_(chunk), is_queued()))
+        ]
+        queue.push_many(snapshots)
+        touched += len(snapshots)
+    return watermark, touched
+
+
+def start_queue_sync(app):
+    """
+    Enable the queue event log for this app. Must run before the queue is
+    loaded so that no event between load and tailing is missed.
+    """
+    with app.app_context():
+        if db.engine.dialect.name != "sqlite":
+            raise ValueError("QUEUE_SYNC_MODE=eventlog requires SQLite; event ids are not gap-free on "
+                             f"{db.engine.dialect.name}")
+        QueueEvent.__table__.create(db.engine, checkfirst=True)
+        enable_event_log()
+        tailer = QueueEventTailer(
+            app,
+            interval=app.config["QUEUE_SYNC_INTERVAL"],
+            retention=app.config["QUEUE_EVENT_RETENTION"],
+        )
+        tailer.mark_position()
+    app.queue_event_tailer = tailer
+    app.before_request(tailer.ensure_running)
+    return tailer
@@ -1,10 +1,13 @@
-from dash import Dash, html, dcc
-from dash.dependencies import Input, Output
+from dash import Dash, html, dcc, ctx
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
 import pandas as pd
 import plotly.express as px
 import dash_bootstrap_components as dbc
-import requests
 import dash_table
+from app.utils.auth import create_scoped_token
+from app.utils.dashboard_data import get_dashboard_task, get_dashboard_tasks, get_dashboard_version
+from app.utils.task_stream import DASHBOARD_IDENTITY, DASHBOARD_STREAM_SCOPE
 
 def create_dash_app(server):
     """Create and configure the Dash application."""
@@ -15,8 +18,6 @@ def create_dash_app(server):
         external_stylesheets=[dbc.themes.BOOTSTRAP],
     )
 
-    API_URL = "http://127.0.0.1:5000/api/tasks/dashboard"
-
     # Layout for Dash app
     dash_app.layout = dbc.Container(
         [
@@ -29,6 +30,7 @@ def create_dash_app(server):
                             options=[
                                 {"label": "All", "value": "All"},
                                 {"label": "Pending", "value": "Pending"},
+                                {"label": "In-Progress", "value": "In-Progress"},
                                 {"label": "Completed", "value": "Completed"},
                             ],
                             value="All",
@@ -70,22 +72,29 @@ def create_dash_app(server):
                     ),
                 ]
             ),
+            # Fallback refresh; live updates arrive through the task stream
             dcc.Interval(
                 id="interval-component",
                 interval=10 * 1000,
                 n_intervals=0,
             ),
+            # Queue version last rendered by this browser tab
+            dcc.Store(id="dashboard-version"),
+            # Latest queue version pushed over /api/tasks/stream
+            dcc.Store(id="stream-version"),
+            # Short-lived /api/tasks/stream token, re-issued whenever the browser asks again
+            dcc.Store(id="stream-token"),
+            dcc.Store(id="stream-token-request"),
+            dcc.Store(id="stream-connected"),
         ],
         fluid=True,
     )
 
-    # Fetch tasks from the Flask API
+    # Read tasks straight from the in-process priority queue
     def fetch_tasks():
         try:
-            response = requests.get(API_URL)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return get_dashboard_tasks()
+        except Exception as e:
             print(f"Error fetching tasks: {e}")
             return []
 
@@ -94,23 +103,31 @@ def create_dash_app(server):
         [
             Output("task-table", "data"),
             Output("task-urgency-chart", "figure"),
+            Output("dashboard-version", "data"),
         ],
         [
             Input("interval-component", "n_intervals"),
+            Input("stream-version", "data"),
             Input("status-filter", "value"),
         ],
+        [State("dashboard-version", "data")],
     )
-    def update_dashboard(n_intervals, status_filter):
+    def update_dashboard(n_intervals, stream_version, status_filter, rendered_version):
+        # Skip the rebuild on a tick or stream event when the queue has not changed
+        version = get_dashboard_version()
+        if ctx.triggered_id in ("interval-component", "stream-version") and rendered_version == version:
+            raise PreventUpdate
+
         tasks = fetch_tasks()
         if not tasks:
-            return [], px.bar(title="No Tasks Available")
+            return [], px.bar(title="No Tasks Available"), version
 
         df = pd.DataFrame(tasks)
 
         # Validate required columns exist in the DataFrame
         required_columns = {"task_id", "urgency", "status", "description", "time_sensitive"}
         if not required_columns.issubset(df.columns):
-            return [], px.bar(title="Invalid Data Format")
+            return [], px.bar(title="Invalid Data Format"), version
 
         # Filter tasks based on status
         if status_filter != "All":
@@ -132,7 +149,50 @@ def create_dash_app(server):
         else:
             urgency_chart = px.bar(title="No Tasks Matching Filter")
 
-        return df.to_dict("records"), urgency_chart
+        return df.to_dict("records"), urgency_chart, version
+
+    # The page renders the whole queue without a login, so it streams under its own
+    # dashboard scope rather than a staff user's token
+    @dash_app.callback(
+        Output("stream-token", "data"),
+        Input("stream-token-request", "data"),
+    )
+    def issue_stream_token(_):
+        return create_scoped_token(DASHBOARD_IDENTITY, DASHBOARD_STREAM_SCOPE, server.config["STREAM_TOKEN_TTL"])
+
+    # Open one EventSource per browser tab and surface each pushed version; on an
+    # error (e.g. the token expired) ask for a new token and reconnect with it
+    dash_app.clientside_callback(
+        """
+        function(token) {
+            if (!token) {
+                return window.dash_clientside.no_update;
+            }
+            if (window.taskStream) {
+                window.taskStream.close();
+            }
+            var params = new URLSearchParams({token: token});
+            if (window.taskStreamLastId) {
+                params.set("last_event_id", window.taskStreamLastId);
+            }
+            var source = new EventSource("/api/tasks/stream?" + params.toString());
+            source.addEventListener("tasks", function(event) {
+                window.taskStreamLastId = event.lastEventId;
+                dash_clientside.set_props("stream-version", {data: event.lastEventId});
+            });
+            source.onerror = function() {
+                source.close();
+                setTimeout(function() {
+                    dash_clientside.set_props("stream-token-request", {data: Date.now()});
+                }, 3000);
+            };
+            window.taskStream = source;
+            return true;
+        }
+        """,
+        Output("stream-connected", "data"),
+        Input("stream-token", "data"),
+    )
 
     # Display selected task details
     @dash_app.callback(
@@ -144,8 +204,7 @@ def create_dash_app(server):
             return html.P("Click on a bar to see task details.", className="text-muted")
 
         task_id = click_data["points"][0]["x"]
-        tasks = fetch_tasks()
-        task = next((t for t in tasks if t["task_id"] == task_id), None)
+        task = get_dashboard_task(task_id)
 
         if task:
             return dbc.Card(
@@ -0,0 +1,164 @@
+"""
+Server-Sent Events fan-out of task queue changes.
+
+One broadcaster thread per worker waits on the queue's `changed`
+condition, turns each burst of mutations into a single delta, serialises
+it once and hands the same message to every subscriber. Slow subscribers
+whose buffer fills up are disconnected; browsers reconnect with
+Last-Event-ID and get the missed delta. Event ids are "epoch:version", so
+an id from another queue instance (another worker, or before a restart)
+gets the full queue instead of a delta against unrelated versions.
+
+Every task in an event carries its queue key as `priority`, so clients
+keep their own ordered copy by applying deltas instead of refetching.
+Each subscriber holds a worker thread (or greenlet) for as long as it
+is connected; at most `max_subscribers` are admitted per process.
+"""
+import json
+import logging
+import queue
+import threading
+from app.utils.background import BackgroundThread
+from app.utils.dashboard_data import serialize_task
+
+logger = logging.getLogger(__name__)
+
+# Scopes of the tokens /tasks/stream accepts in its query string: staff
+# clients get one from /tasks/stream/token, the Dash page from its own callback
+STREAM_TOKEN_SCOPE = "task-stream"
+DASHBOARD_STREAM_SCOPE = "task-dashboard"
+DASHBOARD_IDENTITY = "dashboard"
+
+
+class StreamFull(Exception):
+    """Raised when the broadcaster already has `max_subscribers` subscribers."""
+
+
+def serialize_entry(key, task):
+    """serialize_task plus the task's queue key, which clients sort by."""
+    return dict(serialize_task(task), priority=list(key))
+
+
+def format_event(epoch, version, payload, event="tasks"):
+    return f"id: {epoch}:{version}\nevent: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def parse_event_id(event_id):
+    """(epoch, version) from an id written by format_event; None when malformed."""
+    epoch, _, version = (event_id or "").partition(":")
+    if not epoch or not version.isdigit():
+        return None
+    return epoch, int(version)
+
+
+def snapshot_event(task_queue):
+    """(version, message) with the full queue contents."""
+    version, entries = task_queue.versioned_tasks()
+    return version, format_event(task_queue.epoch, version, {
+        "version": version,
+        "epoch": task_queue.epoch,
+        "full": True,
+        "tasks": [serialize_entry(key, task) for key, task in entries],
+    })
+
+
+def delta_event(task_queue, since):
+    """(version, message) with the changes after `since`, or a snapshot if too old."""
+    delta = task_queue.changes_since(since, keyed=True)
+    if delta is None:
+        return snapshot_event(task_queue)
+    version, added, changed, removed = delta
+    return version, format_event(task_queue.epoch, version, {
+        "version": version,
+        "epoch": task_queue.epoch,
+        "since": since,
+        "added": [serialize_entry(key, task) for key, task in added],
+        "changed": [serialize_entry(key, task) for key, task in changed],
+        "removed": removed,
+    })
+
+
+def resume_event(task_queue, last_event_id):
+    """
+    (version, message) to start a subscriber with: the delta after
+    `last_event_id` when it came from this queue instance, else the full queue.
+    """
+    position = parse_event_id(last_event_id)
+    if position is None or position[0] != task_queue.epoch:
+        return snapshot_event(task_queue)
+    return delta_event(task_queue, position[1])
+
+
+class Subscriber:
+    def __init__(self, buffer_size):
+        self.messages = queue.Queue(maxsize=buffer_size)
+        self.closed = threading.Event()
+
+
+class TaskBroadcaster:
+    def __init__(self, task_queue, heartbeat=15, buffer_size=100, max_subscribers=100):
+        self.task_queue = task_queue
+        self.heartbeat = heartbeat
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self.subscribers = set()
+        self._subscribers_lock = threading.Lock()
+        self._worker = BackgroundThread(self._run, "task-stream-broadcaster")
+
+    def subscribe(self):
+        self._worker.ensure_running()
+        subscriber = Subscriber(self.buffer_size)
+        with self._subscribers_lock:
+            if self.max_subscribers and len(self.subscribers) >= self.max_subscribers:
+                raise StreamFull()
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        subscriber.closed.set()
+        with self._subscribers_lock:
+            self.subscribers.discard(subscriber)
+
+    def publish(self, version, message):
+        with self._subscribers_lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.messages.put_nowait((version, message))
+            except queue.Full:
+                logger.warning("Dropping slow task stream subscriber")
+                self.unsubscribe(subscriber)
+
+    def stream(self, subscriber, initial_version, initial_message):
+        """
+        Generator for the SSE response body of one subscriber. The initial
+        message is built after subscribing, so no change is missed; deltas
+        queued meanwhile that it already covers are skipped.
+        """
+        try:
+            yield initial_message
+            while not subscriber.closed.is_set():
+                try:
+                    version, message = subscriber.messages.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if version > initial_version:
+                    yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+    def _run(self):
+        task_queue = self.task_queue
+        version = task_queue.version
+        while True:
+            try:
+                with task_queue.changed:
+                    if not task_queue.changed.wait_for(lambda: task_queue.version != version, timeout=self.heartbeat):
+                        continue
+                # Serialise outside the queue lock; later changes are picked up next round
+                version, message = delta_event(task_queue, version)
+                if self.subscribers:
+                    self.publish(version, message)
+            except Exception as e:
+                logger.error(f"Error broadcasting task changes: {e}")
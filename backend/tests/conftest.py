@@ -0,0 +1,57 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.models import db
+from app.models.user_model import User
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'tasks.db'}",
+        "QUEUE_WARMUP": "sync",
+        "QUEUE_SNAPSHOT_PATH": "",
+        "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+        "JWT_SECRET_KEY": "test-secret",
+    })
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_headers(app):
+    with app.app_context():
+        admin = User.query.filter_by(email=app.config["ADMIN_EMAIL"]).one()
+        token = create_access_token(identity=admin.emp_id)
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def make_task(app):
+    """Insert a task through the ORM, queue it like the routes do, and return its task_id."""
+    from datetime import datetime, timedelta
+    from app.models.patient_model import Patient
+    from app.models.task_model import Task
+
+    def make(urgency=3, minutes=60, status="Pending", **columns):
+        with app.app_context():
+            patient = Patient.query.first()
+            if patient is None:
+                patient = Patient(first_name="Test", last_name="Patient", age=40, gender="F", condition="-")
+                db.session.add(patient)
+                db.session.flush()
+            task = Task(patient_id=patient.patient_id, description="task", urgency=urgency, status=status,
+                        time_sensitive=datetime.now() + timedelta(minutes=minutes), **columns)
+            db.session.add(task)
+            db.session.commit()
+            if task.status == "Pending":
+                app.task_priority_queue.push(task)
+            return task.task_id
+    return make
@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+from app import create_app
+from app.models import db
+from app.models.log_model import Log
+from app.models.user_model import User
+from app.utils.audit_log import log_action
+
+
+@pytest.fixture
+def buffered_app(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'tasks.db'}",
+        "QUEUE_WARMUP": "sync",
+        "QUEUE_SNAPSHOT_PATH": "",
+        "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+        "AUDIT_LOG_MODE": "buffered",
+        # Flushed by the test, not the writer thread
+        "AUDIT_LOG_FLUSH_INTERVAL": 3600,
+    })
+    yield app
+    app.audit_log.stop()
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def logged_actions(app):
+    app.audit_log.flush()
+    with app.app_context():
+        return [log.action for log in Log.query.all()]
+
+
+def test_buffered_entry_is_written_after_commit(buffered_app):
+    with buffered_app.app_context():
+        admin = User.query.filter_by(email=buffered_app.config["ADMIN_EMAIL"]).one()
+        log_action(admin.emp_id, "committed action")
+        # Nothing is queued until the caller's transaction commits
+        assert buffered_app.audit_log.flush() == 0
+        db.session.commit()
+    assert logged_actions(buffered_app) == ["committed action"]
+
+
+def test_buffered_entry_is_dropped_when_commit_fails(buffered_app):
+    with buffered_app.app_context():
+        admin = User.query.filter_by(email=buffered_app.config["ADMIN_EMAIL"]).one()
+        db.session.add(User(email=admin.email, password_hash="-", role=admin.role))
+        log_action(admin.emp_id, "rolled back action")
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+        # A later commit on the same session must not release the dropped entry
+        db.session.commit()
+    assert logged_actions(buffered_app) == []
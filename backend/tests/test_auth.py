@@ -0,0 +1,79 @@
+import threading
+from flask_jwt_extended import create_access_token
+from sqlalchemy import update
+from app.models import db
+from app.models.task_model import Task
+from app.models.user_model import DOCTOR, NURSE, User
+
+
+def login(client, app, password):
+    return client.post("/api/login", json={"username": app.config["ADMIN_EMAIL"], "password": password})
+
+
+def test_login_reads_the_current_password_hash(app, client):
+    assert login(client, app, app.config["ADMIN_PASSWORD"]).status_code == 200
+    with app.app_context():
+        # Changed by another worker, so this worker's caches are never invalidated
+        new_hash = app.login_pipeline.hash_password("changed")
+        db.session.execute(update(User).where(User.email == app.config["ADMIN_EMAIL"]).values(password_hash=new_hash))
+        db.session.commit()
+    assert login(client, app, app.config["ADMIN_PASSWORD"]).status_code == 401
+    assert login(client, app, "changed").status_code == 200
+
+
+def test_identity_cache_holds_no_password_hash(app, client):
+    assert login(client, app, app.config["ADMIN_PASSWORD"]).status_code == 200
+    with app.app_context():
+        admin = User.query.filter_by(email=app.config["ADMIN_EMAIL"]).one()
+        record = app.login_pipeline.identity(admin.emp_id)
+    assert not hasattr(record, "password_hash")
+
+
+def test_login_timeout_is_503_and_holds_its_slot(app, client, monkeypatch):
+    pipeline = app.login_pipeline
+    release = threading.Event()
+    verify = pipeline._verify
+
+    def slow_verify(credentials, password):
+        release.wait(5)
+        return verify(credentials, password)
+
+    monkeypatch.setattr(pipeline, "_verify", slow_verify)
+    monkeypatch.setattr(pipeline, "_slots", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(pipeline, "timeout", 0.05)
+    response = login(client, app, app.config["ADMIN_PASSWORD"])
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    # The timed-out check is still running, so its slot is still taken
+    assert login(client, app, app.config["ADMIN_PASSWORD"]).status_code == 503
+    release.set()
+    monkeypatch.setattr(pipeline, "timeout", 5)
+    for _ in range(50):
+        if pipeline._slots.acquire(timeout=0.1):
+            pipeline._slots.release()
+            break
+    assert login(client, app, app.config["ADMIN_PASSWORD"]).status_code == 200
+
+
+def headers_for(app, role):
+    with app.app_context():
+        user = User(email=f"{role.lower()}@example.com", password_hash="-", role=role)
+        db.session.add(user)
+        db.session.commit()
+        return {"Authorization": f"Bearer {create_access_token(identity=user.emp_id)}"}
+
+
+def test_nurse_cannot_delete_tasks_or_patients(app, client, make_task):
+    task_id = make_task()
+    with app.app_context():
+        patient_id = db.session.get(Task, task_id).patient_id
+    nurse = headers_for(app, NURSE)
+    assert client.delete(f"/api/tasks/{task_id}", headers=nurse).status_code == 403
+    assert client.delete(f"/api/patients/{patient_id}", headers=nurse).status_code == 403
+    # Nurses keep read access, and nothing was deleted
+    assert client.get("/api/tasks/heap", headers=nurse).status_code == 200
+    assert task_id in app.task_priority_queue
+
+    doctor = headers_for(app, DOCTOR)
+    assert client.delete(f"/api/tasks/{task_id}", headers=doctor).status_code == 200
+    assert client.delete(f"/api/patients/{patient_id}", headers=doctor).status_code == 200
@@ -0,0 +1,55 @@
+import random
+import pytest
+from app.utils.priority_queue import IndexedDaryHeap, decode_cursor, encode_cursor
+
+
+def drain(heap):
+    items = []
+    while heap:
+        key = heap.key_at(0)
+        items.append((key, heap.extract_min()))
+    return items
+
+
+@pytest.mark.parametrize("arity", [2, 4, 8])
+def test_insert_update_delete_keep_heap_order(arity):
+    rng = random.Random(arity)
+    heap = IndexedDaryHeap(arity)
+    keys = {}
+    for n in range(400):
+        keys[f"T{n}"] = (float(rng.randint(1, 5)), float(rng.randint(0, 1000)))
+        heap.insert(f"T{n}", keys[f"T{n}"])
+    for item_id in rng.sample(sorted(keys), 100):
+        keys[item_id] = (float(rng.randint(1, 5)), float(rng.randint(0, 1000)))
+        heap.update(item_id, keys[item_id])
+    for item_id in rng.sample(sorted(keys), 50):
+        heap.delete(item_id)
+        del keys[item_id]
+    assert heap.key_of(next(iter(keys))) == keys[next(iter(keys))]
+    drained = drain(heap)
+    assert [key for key, _ in drained] == sorted(keys.values())
+    assert {item_id for _, item_id in drained} == set(keys)
+    assert heap.index == {}
+
+
+def test_extend_matches_sequential_inserts():
+    items = [(f"T{n}", (float(n % 7), float(n))) for n in range(300)]
+    heap = IndexedDaryHeap()
+    heap.insert("first", (0.0, 0.0))
+    heap.extend(items)
+    assert [item_id for _, item_id in drain(heap)] == ["first"] + [i for i, _ in sorted(items, key=lambda x: x[1])]
+
+
+def test_from_sorted_and_iter_items():
+    items = [(f"T{n}", (1.0, float(n))) for n in range(50)]
+    heap = IndexedDaryHeap.from_sorted(items)
+    assert [item_id for _, item_id in heap.iter_items()] == [item_id for item_id, _ in items]
+    assert [item_id for _, item_id in heap.iter_items((1.0, 45.0))] == ["T45", "T46", "T47", "T48", "T49"]
+    assert len(heap) == 50 and heap.peek_id() == "T0"
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor((2.0, 1893456000.5), "T00042")
+    assert decode_cursor(cursor) == ((2.0, 1893456000.5), "T00042")
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
@@ -0,0 +1,47 @@
+def test_dashboard_honours_etag_until_queue_changes(app, client, make_task):
+    make_task(urgency=3)
+    response = client.get("/api/tasks/dashboard")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    version = response.headers["X-Queue-Version"]
+
+    cached = client.get("/api/tasks/dashboard", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+
+    make_task(urgency=1)
+    changed = client.get("/api/tasks/dashboard", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert int(changed.headers["X-Queue-Version"]) > int(version)
+
+
+def test_dashboard_delta_since_version(app, client, make_task):
+    queue = app.task_priority_queue
+    kept = make_task(urgency=3)
+    removed = make_task(urgency=4)
+    version = queue.version
+    added = make_task(urgency=1)
+    queue.discard(removed)
+
+    delta = client.get(f"/api/tasks/dashboard?since={version}&epoch={queue.epoch}").get_json()
+    assert delta["version"] == queue.version and delta["epoch"] == queue.epoch
+    assert [task["task_id"] for task in delta["added"]] == [added]
+    assert delta["removed"] == [removed]
+    assert kept not in {task["task_id"] for task in delta["added"] + delta["changed"]}
+
+    # A version from another queue instance is meaningless here
+    full = client.get(f"/api/tasks/dashboard?since={version}&epoch=other").get_json()
+    assert full["full"] is True
+    assert {task["task_id"] for task in full["tasks"]} == {kept, added}
+
+
+def test_dashboard_delta_from_unknown_version_is_full(app, client, make_task):
+    queue = app.task_priority_queue
+    make_task()
+    body = client.get(f"/api/tasks/dashboard?since={queue.version + 5}&epoch={queue.epoch}").get_json()
+    assert body["full"] is True and len(body["tasks"]) == 1
+
+
+def test_dashboard_rejects_bad_since(client):
+    assert client.get("/api/tasks/dashboard?since=abc").status_code == 400
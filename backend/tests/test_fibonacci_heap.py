@@ -0,0 +1,78 @@
+import random
+import pytest
+from app.utils.priority_queue import FibonacciHeap
+
+
+def drain(heap):
+    keys = []
+    while heap.min_node:
+        keys.append(heap.extract_min().key)
+    return keys
+
+
+def test_extract_min_returns_keys_in_order():
+    heap = FibonacciHeap()
+    keys = random.Random(1).sample(range(1000), 200)
+    for key in keys:
+        heap.insert(key)
+    assert len(heap) == 200
+    assert drain(heap) == sorted(keys)
+
+
+def test_decrease_key_moves_node_to_front():
+    heap = FibonacciHeap()
+    nodes = [heap.insert(key, key) for key in range(10, 100)]
+    heap.extract_min()  # consolidate so the nodes have parents
+    heap.decrease_key(nodes[50], 1)
+    assert heap.peek_min() == 60
+    assert drain(heap)[0] == 1
+
+
+def test_decrease_key_rejects_larger_key():
+    heap = FibonacciHeap()
+    node = heap.insert(5)
+    with pytest.raises(ValueError):
+        heap.decrease_key(node, 6)
+
+
+def test_delete_and_increase_key_keep_heap_order():
+    rng = random.Random(2)
+    heap = FibonacciHeap()
+    nodes = {key: heap.insert(key) for key in rng.sample(range(10000), 500)}
+    heap.extract_min()
+    expected = sorted(nodes)[1:]
+    for key in rng.sample(expected, 100):
+        heap.delete(nodes[key])
+        expected.remove(key)
+    for key in rng.sample(expected, 50):
+        heap.increase_key(nodes[key], key + 20000)
+        expected[expected.index(key)] = key + 20000
+    assert len(heap) == len(expected)
+    assert drain(heap) == sorted(expected)
+
+
+def test_meld_combines_heaps():
+    left, right = FibonacciHeap(), FibonacciHeap()
+    for key in (5, 3, 9):
+        left.insert(key)
+    for key in (4, 1, 8):
+        right.insert(key)
+    left.meld(right)
+    assert len(left) == 6 and len(right) == 0 and right.min_node is None
+    assert drain(left) == [1, 3, 4, 5, 8, 9]
+
+
+def test_from_sorted_builds_valid_heap():
+    items = [(key, f"v{key}") for key in range(37)]
+    heap, nodes = FibonacciHeap.from_sorted(items)
+    assert [node.value for node in nodes] == [value for _, value in items]
+    assert [node.value for node in heap.iter_nodes()] == [value for _, value in items]
+    assert drain(heap) == list(range(37))
+
+
+def test_iter_nodes_does_not_modify_heap():
+    heap = FibonacciHeap()
+    for key in (7, 2, 9, 4):
+        heap.insert(key)
+    assert [node.key for node in heap.iter_nodes()] == [2, 4, 7, 9]
+    assert len(heap) == 4 and heap.peek_min() is None and heap.min_node.key == 2
@@ -0,0 +1,30 @@
+from sqlalchemy import text
+from app.models import db
+from app.models.id_counter_model import ensure_id_width, next_string_ids
+from app.models.task_model import Task
+
+
+def test_ids_past_999_sort_numerically(app):
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(text("UPDATE id_counters SET last_value = 997 WHERE prefix = 'T'"))
+            task_ids = next_string_ids(connection, "T", 4)
+    assert [int(task_id[1:]) for task_id in task_ids] == [998, 999, 1000, 1001]
+    assert sorted(task_ids) == task_ids
+
+
+def test_short_ids_are_padded_with_their_references(app, make_task):
+    task_id = make_task()
+    with app.app_context():
+        patient_id = db.session.get(Task, task_id).patient_id
+        # Rows from before IDs were padded
+        with db.engine.begin() as connection:
+            connection.execute(text("UPDATE tasks SET task_id = 'T1000', patient_id = 'P7'"))
+            connection.execute(text("UPDATE patients SET patient_id = 'P7' WHERE patient_id = :id"),
+                               {"id": patient_id})
+            connection.execute(text("INSERT INTO queue_events (task_id, op, origin) VALUES ('T1000', 'upsert', 'x')"))
+        ensure_id_width()
+        task = db.session.execute(text("SELECT task_id, patient_id FROM tasks")).one()
+        assert tuple(task) == ("T000001000", "P000000007")
+        assert db.session.execute(text("SELECT patient_id FROM patients")).scalar() == "P000000007"
+        assert db.session.execute(text("SELECT task_id FROM queue_events")).scalar() == "T000001000"
@@ -0,0 +1,51 @@
+from flask_jwt_extended import create_access_token
+from sqlalchemy import text
+from app import create_app
+from app.models import db
+from app.models.log_model import Log
+from app.models.user_model import NURSE, User
+
+
+def test_logs_require_administrator(app, client, admin_headers):
+    assert client.get("/api/logs").status_code == 401
+    with app.app_context():
+        nurse = User(email="nurse@example.com", password_hash="-", role=NURSE)
+        db.session.add(nurse)
+        db.session.commit()
+        nurse_token = create_access_token(identity=nurse.emp_id)
+    response = client.get("/api/logs", headers={"Authorization": f"Bearer {nurse_token}"})
+    assert response.status_code == 403
+    assert client.get("/api/logs", headers=admin_headers).status_code == 200
+
+
+def page_through_logs(client, headers, limit=2, max_pages=50):
+    seen, cursor = [], None
+    for _ in range(max_pages):
+        query = f"/api/logs?limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        body = client.get(query, headers=headers).get_json()
+        seen += [log["log_id"] for log in body["logs"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return seen
+    raise AssertionError(f"Paging did not finish; saw {seen}")
+
+
+def test_keyset_pages_through_same_second_logs(app, client, admin_headers):
+    with app.app_context():
+        admin = User.query.filter_by(email=app.config["ADMIN_EMAIL"]).one()
+        db.session.add_all(Log(user_id=admin.emp_id, action=f"action {i}") for i in range(5))
+        db.session.commit()
+        # Rows written by the old current_timestamp default share one second-precision value
+        with db.engine.begin() as connection:
+            for i in range(5):
+                connection.execute(text(
+                    "INSERT INTO logs (log_id, user_id, action, timestamp) "
+                    "VALUES (:log_id, :user_id, 'legacy', '2024-01-01 12:00:00')"
+                ), {"log_id": f"LEGACY{i}", "user_id": admin.emp_id})
+        expected = [log_id for (log_id,) in db.session.query(Log.log_id)]
+
+    # Booting migrates the legacy rows to the format bound cursor values use
+    create_app(dict(app.config))
+    seen = page_through_logs(client, admin_headers)
+    assert sorted(seen) == sorted(expected)
+    assert len(seen) == len(set(seen))
@@ -0,0 +1,94 @@
+import json
+from app.models import db
+from app.models.log_model import Log
+from app.models.patient_model import Patient
+from app.models.user_model import User
+
+
+def page_through(client, headers, url, key, limit=2, max_pages=50):
+    """Every row of a keyset-paged list, following next_cursor to the end."""
+    rows, cursor = [], None
+    separator = "&" if "?" in url else "?"
+    for _ in range(max_pages):
+        query = f"{url}{separator}limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(query, headers=headers)
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        rows += body[key]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return rows
+    raise AssertionError(f"Paging {url} did not finish")
+
+
+def test_task_pages_match_the_full_list(client, admin_headers, make_task):
+    for urgency in (3, 1, 2, 1, 5):
+        make_task(urgency=urgency)
+    full = client.get("/api/tasks", headers=admin_headers).get_json()
+    paged = page_through(client, admin_headers, "/api/tasks", "tasks")
+    assert paged == full
+    assert [task["task_id"] for task in paged] == sorted(task["task_id"] for task in full)
+
+
+def test_task_pages_by_priority_with_filters(client, admin_headers, make_task):
+    make_task(urgency=1, status="Completed")
+    expected = [make_task(urgency=urgency, minutes=minutes) for urgency, minutes in ((2, 30), (1, 90), (2, 10))]
+    make_task(urgency=5)
+    rows = page_through(client, admin_headers, "/api/tasks?order=priority&status=Pending&urgency_max=2"
+                                               "&fields=task_id,urgency", "tasks")
+    assert [row["task_id"] for row in rows] == [expected[1], expected[2], expected[0]]
+    assert all(set(row) == {"task_id", "urgency"} for row in rows)
+
+
+def test_patient_pages(app, client, admin_headers):
+    with app.app_context():
+        db.session.add_all(Patient(first_name=f"P{i}", last_name="Test", age=30, gender="F", condition="-")
+                           for i in range(5))
+        db.session.commit()
+    full = client.get("/api/patients", headers=admin_headers).get_json()
+    assert page_through(client, admin_headers, "/api/patients", "patients", limit=3) == full
+
+
+def test_log_pages_filtered_by_user_newest_first(app, client, admin_headers):
+    with app.app_context():
+        admin = User.query.filter_by(email=app.config["ADMIN_EMAIL"]).one()
+        other = User(email="other@example.com", password_hash="-", role=admin.role)
+        db.session.add(other)
+        db.session.flush()
+        db.session.add_all(Log(user_id=admin.emp_id, action=f"admin {i}") for i in range(4))
+        db.session.add(Log(user_id=other.emp_id, action="other"))
+        db.session.commit()
+        admin_id = admin.emp_id
+    rows = page_through(client, admin_headers, f"/api/logs?user_id={admin_id}", "logs")
+    assert len(rows) == 4 and {row["user_id"] for row in rows} == {admin_id}
+    keys = [(row["timestamp"], row["log_id"]) for row in rows]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_bad_limit_and_cursor_are_400(client, admin_headers):
+    assert client.get("/api/tasks?limit=0", headers=admin_headers).status_code == 400
+    assert client.get("/api/patients?limit=2&cursor=garbage", headers=admin_headers).status_code == 400
+
+
+def test_task_exports_stream_every_row(client, admin_headers, make_task, monkeypatch):
+    from app.utils import pagination
+    # Several database batches per export
+    monkeypatch.setattr(pagination, "STREAM_BATCH_SIZE", 2)
+    for urgency in (4, 2, 3, 1, 5):
+        make_task(urgency=urgency)
+    full = client.get("/api/tasks?order=priority", headers=admin_headers).get_json()
+
+    response = client.get("/api/tasks?order=priority&stream=json", headers=admin_headers)
+    assert response.is_streamed and response.mimetype == "application/json"
+    assert response.get_json() == full
+
+    response = client.get("/api/tasks?order=priority&stream=ndjson", headers=admin_headers)
+    assert response.mimetype == "application/x-ndjson"
+    assert [json.loads(line) for line in response.get_data(as_text=True).splitlines()] == full
+
+
+def test_exports_of_no_rows_and_bad_format(client, admin_headers):
+    response = client.get("/api/tasks?status=Completed&stream=json", headers=admin_headers)
+    assert response.get_json() == []
+    assert client.get("/api/patients?stream=ndjson", headers=admin_headers).get_data(as_text=True) == ""
+    assert client.get("/api/logs?stream=csv", headers=admin_headers).status_code == 400
@@ -0,0 +1,73 @@
+import os
+import time
+from datetime import datetime, timedelta
+import pytest
+from app.utils.background import BackgroundThread
+from app.utils.priority_queue import QUEUE_ENGINES, TaskSnapshot, create_task_queue
+from app.utils.queue_aging import OVERDUE_URGENCY, DeadlineAwarePriority, TimingWheel
+
+# Deadline of the tasks below; near the wall clock, which bulk_load keys and starts the wheel at
+T0 = round(time.time()) + 6 * 3600
+BASE = datetime.fromtimestamp(T0)
+
+
+def make_task(n, urgency=5, minutes=0):
+    return TaskSnapshot(f"T{n:05d}", "P001", f"task {n}", urgency, BASE + timedelta(minutes=minutes), "Pending")
+
+
+def test_wheel_fires_each_timer_once_at_its_tick():
+    wheel = TimingWheel(slots=4, levels=2, start=0)
+    # One per level, plus two past the top level's rotation of 16 ticks
+    for item, when in (("a", 3), ("b", 10), ("c", 40), ("d", 100)):
+        wheel.schedule(item, when)
+    fired = {}
+    for now in (2, 3, 9, 10, 39, 40, 99, 100):
+        for item in wheel.advance(now):
+            fired.setdefault(item, now)
+    assert fired == {"a": 3, "b": 10, "c": 40, "d": 100}
+    assert len(wheel) == 0
+
+
+def test_wheel_reschedule_and_cancel():
+    wheel = TimingWheel(start=0)
+    wheel.schedule("a", 10)
+    wheel.schedule("a", 20)
+    wheel.schedule("b", 10)
+    wheel.cancel("b")
+    assert wheel.advance(15) == []
+    assert wheel.advance(20) == ["a"]
+
+
+def test_deadline_policy_caps_urgency_as_deadline_nears():
+    policy = DeadlineAwarePriority()
+    task = make_task(1, urgency=5)
+    assert policy.key(task, T0 - 5 * 3600)[0] == 5
+    assert policy.key(task, T0 - 2 * 3600)[0] == 3
+    assert policy.key(task, T0 - 600)[0] == 1
+    assert policy.key(task, T0 + 1)[0] == OVERDUE_URGENCY
+    assert policy.next_escalation(task, T0 - 5 * 3600) == T0 - 4 * 3600
+
+
+@pytest.mark.parametrize("engine", sorted(QUEUE_ENGINES))
+def test_age_rekeys_due_tasks_and_tracks_overdue(engine):
+    queue = create_task_queue(engine, DeadlineAwarePriority())
+    fresh = make_task(1, urgency=1, minutes=600)
+    late = make_task(2, urgency=5, minutes=0)
+    queue.bulk_load([fresh, late])
+    queue.age(T0 - 5 * 3600)
+    assert queue.peek().task_id == fresh.task_id
+    assert queue.age(T0 + 1) == 1
+    assert queue.peek().task_id == late.task_id
+    assert [task["task_id"] for task in queue.overdue_tasks(now=T0 + 1)] == [late.task_id]
+
+
+def test_background_thread_restarts_in_forked_child():
+    runs = []
+    worker = BackgroundThread(lambda: runs.append(os.getpid()), "test-worker")
+    assert worker.ensure_running() is True
+    assert worker.ensure_running() is False
+    # A forked child inherits the object but not the thread
+    worker._pid = -1
+    assert worker.ensure_running() is True
+    worker._thread.join()
+    assert len(runs) == 2
@@ -0,0 +1,55 @@
+import atexit
+import pytest
+from sqlalchemy import insert
+from app import create_app
+from app.models import db
+from app.models.queue_event_model import QueueEvent
+from app.models.task_model import Task
+from app.utils.queue_snapshot import QueueSnapshotWriter, read_snapshot
+
+
+def edit_elsewhere(app, task_id, urgency, event_log=False):
+    """Change a task the way another worker would, without touching this worker's queue."""
+    with app.app_context():
+        db.session.get(Task, task_id).urgency = urgency
+        if event_log:
+            db.session.execute(insert(QueueEvent.__table__).values(task_id=task_id, op="upsert", origin="other:1"))
+        db.session.commit()
+
+
+@pytest.fixture
+def snapshot_config(app, tmp_path):
+    return dict(app.config, QUEUE_SNAPSHOT_PATH=str(tmp_path / "task_queue.snapshot"))
+
+
+def test_local_snapshot_reconciles_other_workers_edits(app, client, admin_headers, make_task, snapshot_config):
+    task_id = make_task(urgency=3)
+    client.post("/api/tasks/sync?full=true", headers=admin_headers)
+    edit_elsewhere(app, task_id, urgency=1)
+
+    writer = QueueSnapshotWriter(app, snapshot_config["QUEUE_SNAPSHOT_PATH"])
+    assert writer.write() == 1
+    watermark, tasks = read_snapshot(writer.path, writer.fingerprint)
+    # This worker never saw the edit, so the snapshot must not vouch for it
+    assert watermark == app.task_sync_watermark and tasks[0].urgency == 3
+
+    restored = create_app(snapshot_config)
+    atexit.unregister(restored.queue_snapshot_writer.write_on_exit)
+    assert restored.task_priority_queue.get(task_id).urgency == 1
+
+
+def test_eventlog_snapshot_catches_up_before_capture(app, make_task, snapshot_config):
+    eventlog = create_app(dict(snapshot_config, QUEUE_SNAPSHOT_PATH="", QUEUE_SYNC_MODE="eventlog",
+                               QUEUE_SYNC_INTERVAL=3600))
+    try:
+        task_id = make_task(urgency=3)
+        with eventlog.app_context():
+            eventlog.queue_event_tailer.poll()
+        edit_elsewhere(app, task_id, urgency=1, event_log=True)
+
+        writer = QueueSnapshotWriter(eventlog, snapshot_config["QUEUE_SNAPSHOT_PATH"])
+        writer.write()
+        _, tasks = read_snapshot(writer.path, writer.fingerprint)
+        assert [(task.task_id, task.urgency) for task in tasks] == [(task_id, 1)]
+    finally:
+        eventlog.queue_event_tailer.stop()
@@ -0,0 +1,117 @@
+from datetime import timedelta
+import pytest
+from sqlalchemy import insert, select, update
+from app import create_app
+from app.models import db
+from app.models.queue_event_model import QueueEvent
+from app.models.task_model import Task
+from app.utils.queue_sync import queue_watermark, reconcile_queue
+
+
+@pytest.fixture
+def sync_app(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'sync.db'}",
+        "QUEUE_WARMUP": "sync",
+        "QUEUE_SNAPSHOT_PATH": "",
+        "QUEUE_SYNC_MODE": "eventlog",
+        # Polled by hand below
+        "QUEUE_SYNC_INTERVAL": 3600,
+        "QUEUE_EVENT_RETENTION": 0,
+        "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+    })
+    yield app
+    app.queue_event_tailer.stop()
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def add_foreign_event(task_id):
+    db.session.execute(insert(QueueEvent.__table__).values(task_id=task_id, op="upsert", origin="other:1"))
+    db.session.commit()
+
+
+def test_tailer_applies_foreign_events(sync_app):
+    tailer = sync_app.queue_event_tailer
+    with sync_app.app_context():
+        from app.models.patient_model import Patient
+        patient = Patient(first_name="A", last_name="B", age=1, gender="F", condition="-")
+        db.session.add(patient)
+        db.session.commit()
+        tailer.mark_position()
+        # Written by "another worker": the row exists but this queue has never seen it
+        db.session.execute(insert(Task.__table__).values(
+            task_id="T900", patient_id=patient.patient_id, description="x", urgency=2,
+            time_sensitive=db.func.current_timestamp(), status="Pending"))
+        add_foreign_event("T900")
+        assert tailer.poll() == 1
+    assert "T900" in sync_app.task_priority_queue
+
+
+def test_event_ids_not_reused_after_prune(sync_app):
+    tailer = sync_app.queue_event_tailer
+    with sync_app.app_context():
+        for task_id in ("T1", "T2", "T3"):
+            add_foreign_event(task_id)
+        tailer.poll()
+        position = tailer.last_event_id
+        tailer.prune()
+        remaining = db.session.execute(select(QueueEvent.event_id)).scalars().all()
+        assert remaining == [position]
+        add_foreign_event("T4")
+        assert db.session.execute(select(db.func.max(QueueEvent.event_id))).scalar() > position
+        tailer.apply = lambda task_ids: None
+        assert tailer.poll() == 1
+
+
+def test_reconcile_picks_up_edit_in_watermark_second(app, make_task):
+    task_id = make_task(urgency=3)
+    queue = app.task_priority_queue
+    with app.app_context():
+        watermark = queue_watermark()
+        # Another worker edits the task through the ORM, leaving this queue stale
+        db.session.get(Task, task_id).urgency = 1
+        db.session.commit()
+        new_watermark, touched = reconcile_queue(queue, watermark)
+    assert touched == 1 and new_watermark > watermark
+    assert queue.get(task_id).urgency == 1
+
+
+def test_reconcile_rereads_stamps_just_before_watermark(app, make_task):
+    task_id = make_task(urgency=3)
+    queue = app.task_priority_queue
+    with app.app_context():
+        watermark = queue_watermark()
+        # A worker that stamped updated_at earlier but committed after the watermark was read
+        db.session.execute(update(Task).where(Task.task_id == task_id)
+                           .values(urgency=1, updated_at=watermark - timedelta(milliseconds=500)))
+        db.session.commit()
+        reconcile_queue(queue, watermark)
+    assert queue.get(task_id).urgency == 1
+
+
+def test_reconcile_scans_pending_ids_only_when_asked(app, make_task):
+    task_id = make_task(urgency=3)
+    queue = app.task_priority_queue
+    queue.discard(task_id)
+    with app.app_context():
+        watermark = queue_watermark() + timedelta(seconds=5)
+        # Not updated since the watermark, so only the ID scan notices it is missing
+        assert reconcile_queue(queue, watermark) == (watermark, 0)
+        assert task_id not in queue
+        assert reconcile_queue(queue, watermark, scan=True) == (watermark, 1)
+    assert task_id in queue
+
+
+def test_reconcile_leaves_claims_in_flight_alone(app, make_task):
+    task_id = make_task(urgency=3)
+    queue = app.task_priority_queue
+    # Popped by a claim whose UPDATE has not committed, so the row is still Pending
+    claimed = queue.begin_claim(1)
+    with app.app_context():
+        watermark = queue_watermark()
+        reconcile_queue(queue, watermark - timedelta(seconds=5), scan=True)
+    assert task_id not in queue
+    queue.end_claim(claimed)
+    assert queue.claimed_ids() == set()
@@ -0,0 +1,46 @@
+import time
+from app import start_queue_warmup
+
+
+def wait_until_loaded(queue, timeout=5):
+    deadline = time.monotonic() + timeout
+    while queue.warming:
+        assert time.monotonic() < deadline, "warm-up did not finish"
+        time.sleep(0.01)
+
+
+def test_failed_warmup_is_reported_until_rebuilt(app, client, admin_headers, make_task, monkeypatch):
+    make_task()
+    queue = app.task_priority_queue
+
+    def broken_warm(tasks):
+        raise RuntimeError("database unavailable")
+    monkeypatch.setattr(queue, "warm", broken_warm)
+    start_queue_warmup(app)
+    wait_until_loaded(queue)
+
+    response = client.get("/api/health")
+    assert response.status_code == 503
+    assert response.get_json()["queue"] == "failed"
+    assert "database unavailable" in response.get_json()["queue_error"]
+
+    monkeypatch.undo()
+    assert client.post("/api/tasks/sync", headers=admin_headers).get_json()["mode"] == "full"
+    assert client.get("/api/health").status_code == 200
+    assert len(queue) == 1
+
+
+def test_forked_worker_restarts_unfinished_warmup(app, client, make_task):
+    task_id = make_task()
+    queue = app.task_priority_queue
+    warmer = start_queue_warmup(app)
+    wait_until_loaded(queue)
+    # As in a worker forked from a --preload master before its warm-up finished
+    queue.bulk_load([])
+    queue.begin_warmup()
+    warmer._pid = -1
+    # The first request restarts the warm-up in this "child"; without it the queue would stay warming
+    client.get("/api/health")
+    wait_until_loaded(queue)
+    assert client.get("/api/health").status_code == 200
+    assert task_id in queue
@@ -0,0 +1,97 @@
+import random
+from datetime import datetime, timedelta
+import pytest
+from app.utils.priority_queue import QUEUE_ENGINES, ROLE_PARTITION, TaskSnapshot, create_task_queue
+from app.utils.queue_aging import StaticPriority
+
+BASE = datetime(2030, 1, 1)
+
+
+def make_task(n, urgency=3, minutes=0, role=None):
+    return TaskSnapshot(f"T{n:05d}", "P001", f"task {n}", urgency, BASE + timedelta(minutes=minutes), "Pending",
+                        assigned_role=role)
+
+
+def random_tasks(count, seed=0):
+    rng = random.Random(seed)
+    # Few distinct keys, so many tasks tie and the task_id order matters
+    return [make_task(n, rng.randint(1, 5), rng.randint(0, 20), rng.choice([None, "Doctor", "Nurse"]))
+            for n in range(count)]
+
+
+def expected_order(tasks):
+    return [task.task_id for task in sorted(tasks, key=lambda t: (t.urgency, t.time_sensitive, t.task_id))]
+
+
+@pytest.fixture(params=sorted(QUEUE_ENGINES))
+def queue(request):
+    return create_task_queue(request.param, StaticPriority())
+
+
+def page_through(queue, limit, partition=None):
+    task_ids, cursor = [], None
+    while True:
+        tasks, cursor = queue.page(limit, cursor, partition)
+        task_ids.extend(task["task_id"] for task in tasks)
+        if cursor is None:
+            return task_ids
+
+
+def test_pages_cover_queue_in_order(queue):
+    tasks = random_tasks(500)
+    queue.push_many(tasks)
+    assert page_through(queue, 7) == expected_order(tasks)
+
+
+def test_pages_after_warmup_batches(queue):
+    tasks = random_tasks(600, seed=1)
+    queue.begin_warmup()
+    for start in range(0, len(tasks), 50):
+        queue.warm(tasks[start:start + 50])
+    queue.finish_warmup()
+    assert page_through(queue, 25) == expected_order(tasks)
+    popped = queue.pop()
+    assert page_through(queue, 25) == [task_id for task_id in expected_order(tasks) if task_id != popped.task_id]
+
+
+def test_partition_pages(queue):
+    tasks = random_tasks(300, seed=2)
+    queue.bulk_load(tasks)
+    doctor = [task for task in tasks if task.assigned_role == "Doctor"]
+    assert page_through(queue, 9, (ROLE_PARTITION, "Doctor")) == expected_order(doctor)
+
+
+def test_reprioritize_and_remove(queue):
+    tasks = random_tasks(100, seed=3)
+    queue.bulk_load(tasks)
+    moved = make_task(10, urgency=1, minutes=-5)
+    queue.push(moved)
+    queue.remove("T00020")
+    remaining = [moved if task.task_id == "T00010" else task for task in tasks if task.task_id != "T00020"]
+    assert queue.peek().task_id == "T00010"
+    assert [task.task_id for _, task in queue.ordered_tasks()] == expected_order(remaining)
+    # pop breaks ties between equal keys arbitrarily; only the keys are ordered
+    popped = [queue.pop() for _ in range(len(remaining))]
+    assert [(task.urgency, task.time_sensitive) for task in popped] == sorted(
+        (task.urgency, task.time_sensitive) for task in remaining)
+    with pytest.raises(IndexError):
+        queue.pop()
+
+
+def test_bulk_load_keeps_changes_made_during_build(queue):
+    loaded = [make_task(n) for n in range(5)]
+    queue.push_many(loaded[:3])
+    added = make_task(9, urgency=1)
+
+    def rows():
+        # Requests that land while the new heap is built off-lock
+        yield from loaded[:2]
+        queue.pop()
+        queue.push(added)
+        queue.discard(loaded[3].task_id)
+        yield from loaded[2:]
+
+    queue.bulk_load(rows())
+    # T00000 was popped (e.g. by a claim) before the stale row for it was swapped in
+    assert [task["task_id"] for task in queue.page(10)[0]] == ["T00009", "T00001", "T00002", "T00004"]
+    assert queue.load_touched == []
@@ -0,0 +1,79 @@
+import json
+from app.models import db
+from app.models.task_model import Task
+
+
+def test_claim_takes_highest_priority_task(app, client, admin_headers, make_task):
+    low = make_task(urgency=4)
+    high = make_task(urgency=1)
+    response = client.post("/api/tasks/claim", headers=admin_headers)
+    assert response.status_code == 200
+    assert [task["task_id"] for task in response.get_json()] == [high]
+    assert high not in app.task_priority_queue and low in app.task_priority_queue
+
+
+def test_failed_claim_puts_every_popped_task_back(app, client, admin_headers, make_task, monkeypatch):
+    task_ids = [make_task(urgency=urgency) for urgency in (1, 2, 3)]
+    from app.routes import task_route
+    real_update = task_route.update
+    calls = []
+
+    def failing_update(*args):
+        # The second conditional UPDATE fails after the first task was claimed
+        calls.append(args)
+        if len(calls) == 2:
+            raise RuntimeError("database unavailable")
+        return real_update(*args)
+    monkeypatch.setattr(task_route, "update", failing_update)
+
+    response = client.post("/api/tasks/claim?n=3", headers=admin_headers)
+    assert response.status_code == 500
+    assert app.task_priority_queue.task_ids() == set(task_ids)
+    with app.app_context():
+        assert {task.status for task in Task.query.all()} == {"Pending"}
+
+
+def existing_patient_id(app, make_task):
+    task_id = make_task()
+    with app.app_context():
+        return db.session.get(Task, task_id).patient_id
+
+
+def test_bulk_import_ndjson_reports_bad_rows(app, client, admin_headers, make_task):
+    patient_id = existing_patient_id(app, make_task)
+    rows = [
+        json.dumps({"patient_id": patient_id, "description": "a", "urgency": 2, "time_sensitive": "2030-01-01T09:00"}),
+        "not json",
+        json.dumps({"patient_id": patient_id, "description": "b", "urgency": 9, "time_sensitive": "2030-01-01T09:00"}),
+        json.dumps({"patient_id": "P999999999", "description": "c", "urgency": 1, "time_sensitive": "2030-01-01T09:00"}),
+        json.dumps({"patient_id": patient_id, "description": "d", "urgency": 1, "time_sensitive": "2030-01-01T09:00",
+                    "status": "Completed"}),
+    ]
+    response = client.post("/api/tasks/bulk", data="\n".join(rows), headers=admin_headers,
+                           content_type="application/x-ndjson")
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body["inserted"] == 2
+    assert sorted(error["row"] for error in body["errors"]) == [2, 3, 4]
+    # Only the Pending row is queued
+    first, completed = body["task_ids"]
+    assert first in app.task_priority_queue and completed not in app.task_priority_queue
+
+
+def test_bulk_import_csv(app, client, admin_headers, make_task):
+    patient_id = existing_patient_id(app, make_task)
+    body = ("patient_id,description,urgency,time_sensitive\n"
+            f"{patient_id},a,3,2030-01-01T09:00\n"
+            f"{patient_id},,3,2030-01-01T09:00\n")
+    response = client.post("/api/tasks/bulk", data=body, headers=admin_headers, content_type="text/csv")
+    assert response.status_code == 201
+    result = response.get_json()
+    assert result["inserted"] == 1
+    assert result["errors"] == [{"row": 2, "error": "Missing required fields: description"}]
+    assert result["task_ids"][0] in app.task_priority_queue
+
+
+def test_bulk_import_with_no_valid_rows_is_400(client, admin_headers):
+    response = client.post("/api/tasks/bulk?format=csv", data="patient_id,description\n,\n", headers=admin_headers)
+    assert response.status_code == 400
+    assert response.get_json()["inserted"] == 0
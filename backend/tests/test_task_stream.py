@@ -0,0 +1,133 @@
+import json
+from app.utils.task_stream import Subscriber, delta_event, format_event
+
+
+def first_event(response):
+    chunk = next(iter(response.response)).decode()
+    response.close()
+    data = next(line for line in chunk.splitlines() if line.startswith("data: "))
+    return json.loads(data[len("data: "):])
+
+
+def stream_token(client, headers):
+    response = client.post("/api/tasks/stream/token", headers=headers)
+    assert response.status_code == 200
+    return response.get_json()["token"]
+
+
+def test_stream_requires_token(client, admin_headers):
+    assert client.get("/api/tasks/stream").status_code == 401
+    assert client.get("/api/tasks/stream?token=garbage").status_code == 401
+    # A regular access token is not a stream token
+    access_token = admin_headers["Authorization"].split()[1]
+    assert client.get(f"/api/tasks/stream?token={access_token}").status_code == 401
+
+
+def test_stream_token_rejected_elsewhere(client, admin_headers):
+    token = stream_token(client, admin_headers)
+    response = client.get("/api/tasks/heap", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
+
+
+def test_stream_starts_with_prioritised_snapshot(client, admin_headers, make_task):
+    low = make_task(urgency=4)
+    high = make_task(urgency=1)
+    response = client.get(f"/api/tasks/stream?token={stream_token(client, admin_headers)}")
+    assert response.status_code == 200
+    event = first_event(response)
+    assert event["full"] is True
+    assert [task["task_id"] for task in event["tasks"]] == [high, low]
+    assert all(len(task["priority"]) == 2 for task in event["tasks"])
+
+
+def test_stream_rejects_subscribers_over_cap(app, client, admin_headers):
+    app.task_broadcaster.max_subscribers = 1
+    token = stream_token(client, admin_headers)
+    open_stream = client.get(f"/api/tasks/stream?token={token}")
+    assert client.get(f"/api/tasks/stream?token={token}").status_code == 503
+    open_stream.close()
+
+
+def test_delta_carries_keys_of_changed_tasks(app, make_task):
+    queue = app.task_priority_queue
+    task_id = make_task(urgency=3)
+    version = queue.version
+    queue.reprioritize(task_id, (1, 0.0))
+    _, message = delta_event(queue, version)
+    event = json.loads(message.split("data: ", 1)[1])
+    assert [task["task_id"] for task in event["changed"]] == [task_id]
+    assert event["changed"][0]["priority"] == [1, 0.0]
+
+
+def test_resume_from_same_epoch_sends_delta(client, admin_headers, make_task):
+    queue = client.application.task_priority_queue
+    make_task(urgency=3)
+    last_event_id = f"{queue.epoch}:{queue.version}"
+    added = make_task(urgency=1)
+    token = stream_token(client, admin_headers)
+    response = client.get(f"/api/tasks/stream?token={token}",
+                          headers={"Last-Event-ID": last_event_id})
+    event = first_event(response)
+    assert "full" not in event
+    assert [task["task_id"] for task in event["added"]] == [added]
+
+
+def test_resume_from_other_epoch_sends_snapshot(client, admin_headers, make_task):
+    queue = client.application.task_priority_queue
+    task_id = make_task(urgency=3)
+    # Same version number, but issued by another queue instance (e.g. before a restart)
+    token = stream_token(client, admin_headers)
+    response = client.get(f"/api/tasks/stream?token={token}",
+                          headers={"Last-Event-ID": f"other-epoch:{queue.version}"})
+    event = first_event(response)
+    assert event["full"] is True
+    assert [task["task_id"] for task in event["tasks"]] == [task_id]
+
+
+def test_stream_skips_messages_covered_by_initial_event(app):
+    broadcaster = app.task_broadcaster
+    subscriber = Subscriber(buffer_size=10)
+    subscriber.messages.put((4, format_event("e", 4, {"stale": True})))
+    subscriber.messages.put((6, format_event("e", 6, {"fresh": True})))
+    body = broadcaster.stream(subscriber, 5, format_event("e", 5, {"initial": True}))
+    assert '"initial"' in next(body)
+    assert '"fresh"' in next(body)
+    body.close()
+
+
+def test_dashboard_delta_requires_epoch(client, admin_headers, make_task):
+    queue = client.application.task_priority_queue
+    make_task(urgency=3)
+    version = queue.version
+    make_task(urgency=2)
+    response = client.get(f"/api/tasks/dashboard?since={version}", headers=admin_headers)
+    assert response.get_json()["full"] is True
+    response = client.get(f"/api/tasks/dashboard?since={version}&epoch={queue.epoch}",
+                          headers=admin_headers)
+    assert "full" not in response.get_json()
+
+
+def dashboard_stream_token(client):
+    """The token the Dash page's stream-token callback hands to its EventSource."""
+    response = client.post("/dashboard/_dash-update-component", json={
+        "output": "stream-token.data",
+        "outputs": {"id": "stream-token", "property": "data"},
+        "inputs": [{"id": "stream-token-request", "property": "data", "value": None}],
+        "changedPropIds": [],
+        "state": [],
+    })
+    assert response.status_code == 200
+    return response.get_json()["response"]["stream-token"]["data"]
+
+
+def test_dashboard_streams_with_its_own_token(client, make_task):
+    task_id = make_task()
+    response = client.get(f"/api/tasks/stream?token={dashboard_stream_token(client)}")
+    assert response.status_code == 200
+    assert [task["task_id"] for task in first_event(response)["tasks"]] == [task_id]
+
+
+def test_dashboard_token_is_not_a_staff_token(client):
+    token = dashboard_stream_token(client)
+    assert client.post("/api/tasks/stream/token", headers={"Authorization": f"Bearer {token}"}).status_code == 401
+    assert client.get("/api/tasks/heap", headers={"Authorization": f"Bearer {token}"}).status_code == 401
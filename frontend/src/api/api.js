@@ -107,6 +107,60 @@ export const fetchHeapTasks = async () => {
   }
 };
 
+// Subscribe to live queue changes pushed over Server-Sent Events.
+// EventSource cannot send the Authorization header, so every connection uses a
+// short-lived token from /tasks/stream/token. Calls onChange with each event's
+// payload; returns a function that closes the stream.
+export const subscribeToTaskStream = (onChange) => {
+  let source = null;
+  let retryTimer = null;
+  let lastEventId = null;
+  let closed = false;
+
+  const reconnect = () => {
+    if (!closed) {
+      retryTimer = setTimeout(connect, 3000);
+    }
+  };
+
+  const connect = async () => {
+    try {
+      const response = await apiClient.post("/tasks/stream/token");
+      if (closed) return;
+      const params = new URLSearchParams({ token: response.data.token });
+      if (lastEventId) {
+        // Resume from the last event seen, as Last-Event-ID would
+        params.set("last_event_id", lastEventId);
+      }
+      source = new EventSource(`${API_BASE_URL}/tasks/stream?${params}`);
+      source.addEventListener("tasks", (event) => {
+        lastEventId = event.lastEventId;
+        try {
+          onChange(JSON.parse(event.data));
+        } catch (error) {
+          console.error("Error parsing task stream event:", error);
+        }
+      });
+      source.onerror = (error) => {
+        // The token in the URL may have expired, so reconnect with a fresh one
+        console.error("Task stream error:", error);
+        source.close();
+        reconnect();
+      };
+    } catch (error) {
+      console.error("Error opening task stream:", error);
+      reconnect();
+    }
+  };
+
+  connect();
+  return () => {
+    closed = true;
+    clearTimeout(retryTimer);
+    if (source) source.close();
+  };
+};
+
 // Synchronize the in-memory priority queue with the database
 export const syncHeapWithDB = async () => {
   try {
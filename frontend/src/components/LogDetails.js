@@ -10,6 +10,8 @@ import {
   Button,
   TextField,
   Typography,
+  Checkbox,
+  FormControlLabel,
 } from "@mui/material";
 import { getLogs } from "../api/api";
 
@@ -19,6 +21,7 @@ const LogDetails = () => {
     user_id: "",
     start_date: "",
     end_date: "",
+    archived: false, // Entries rotated to logs_archive
   });
   const [pagination, setPagination] = useState({
     page: 1,
@@ -54,8 +57,8 @@ const LogDetails = () => {
   };
 
   const handleFilterChange = (e) => {
-    const { name, value } = e.target;
-    setFilters((prev) => ({ ...prev, [name]: value }));
+    const { name, value, type, checked } = e.target;
+    setFilters((prev) => ({ ...prev, [name]: type === "checkbox" ? checked : value }));
   };
 
   const applyFilters = () => {
@@ -68,6 +71,7 @@ const LogDetails = () => {
       user_id: "",
       start_date: "",
       end_date: "",
+      archived: false,
     });
     setPagination((prev) => ({ ...prev, page: 1 })); // Reset to page 1
     fetchLogs();
@@ -131,6 +135,18 @@ const LogDetails = () => {
       style={{ marginRight: "10px" }}
     />
 
+        <FormControlLabel
+          control={
+            <Checkbox
+              name="archived"
+              checked={filters.archived}
+              onChange={handleFilterChange}
+            />
+          }
+          label="Archived"
+          style={{ marginRight: "10px", color: "black" }}
+        />
+
         <Button
           variant="contained"
           color="primary"
@@ -1,4 +1,4 @@
-import React, { useState, useEffect,useCallback } from "react";
+import React, { useState, useEffect, useCallback, useMemo } from "react";
 import {
   Table,
   TableBody,
@@ -23,18 +23,53 @@ import {
 } from "@mui/material";
 import {
   fetchTasks,
-  fetchHeapTasks,
-  fetchHighestPriorityTask,
   syncHeapWithDB,
+  subscribeToTaskStream,
   addTask,
   updateTask,
   deleteTask,
 } from "../api/api";
 
+// Queue order: each streamed task's priority is its queue key, ties broken by ID
+const compareQueued = (a, b) =>
+  a.priority[0] - b.priority[0] ||
+  a.priority[1] - b.priority[1] ||
+  (a.task_id < b.task_id ? -1 : a.task_id > b.task_id ? 1 : 0);
+
+// Apply one task stream event to the queue state it was sent against
+const applyTaskEvent = (state, event) => {
+  if (event.full) {
+    return {
+      epoch: event.epoch,
+      version: event.version,
+      tasks: [...event.tasks].sort(compareQueued),
+    };
+  }
+  // A delta from another queue instance, or one already applied, is dropped
+  if (event.epoch !== state.epoch || event.version <= state.version) {
+    return state;
+  }
+  const replaced = new Set([
+    ...event.removed,
+    ...event.added.map((task) => task.task_id),
+    ...event.changed.map((task) => task.task_id),
+  ]);
+  return {
+    epoch: event.epoch,
+    version: event.version,
+    tasks: state.tasks
+      .filter((task) => !replaced.has(task.task_id))
+      .concat(event.added, event.changed)
+      .sort(compareQueued),
+  };
+};
+
 const TaskDetails = () => {
   const [tasks, setTasks] = useState([]); // All tasks from database
-  const [heapTasks, setHeapTasks] = useState([]); // Tasks in the heap
-  const [priorityTask, setPriorityTask] = useState(null);
+  // Tasks in the heap, kept current by the task stream, with the queue epoch and version applied
+  const [queueState, setQueueState] = useState({ epoch: null, version: -1, tasks: [] });
+  const heapTasks = queueState.tasks;
+  const priorityTask = useMemo(() => heapTasks[0] || null, [heapTasks]);
   const [errorMessage, setErrorMessage] = useState("");
   const [isDialogOpen, setIsDialogOpen] = useState(false);
   const [selectedTask, setSelectedTask] = useState(null);
@@ -62,41 +97,24 @@ const TaskDetails = () => {
     }
   }, [resetError]);
 
-  // Fetch tasks from the heap
-  const loadHeapTasks = useCallback(async () => {
-    try {
-      resetError();
-      const response = await fetchHeapTasks();
-      setHeapTasks(Array.isArray(response) ? response : []);
-    } catch (error) {
-      setErrorMessage("Error fetching tasks from heap.");
-    }
-  }, [resetError]);
-
-  // Fetch the highest-priority task
-  const loadPriorityTask = useCallback(async () => {
-    try {
-      resetError();
-      const response = await fetchHighestPriorityTask();
-      setPriorityTask(response || null);
-    } catch (error) {
-      setErrorMessage("Error fetching the highest-priority task.");
-    }
-  }, [resetError]);
-
   // Load tasks when the component mounts
   useEffect(() => {
     loadAllTasks();
-    loadHeapTasks();
-    loadPriorityTask();
-  }, [loadAllTasks, loadHeapTasks, loadPriorityTask]);
+  }, [loadAllTasks]);
+
+  // The stream starts with the full queue and then pushes only what changed
+  useEffect(() => {
+    const unsubscribe = subscribeToTaskStream((event) => {
+      setQueueState((state) => applyTaskEvent(state, event));
+    });
+    return unsubscribe;
+  }, []);
 
   // Sync in-memory queue with the database
   const handleSync = async () => {
     try {
       resetError();
-      await syncHeapWithDB();
-      loadHeapTasks(); // Reload heap tasks after sync
+      await syncHeapWithDB(); // The task stream pushes the resulting changes
     } catch (error) {
       setErrorMessage("Error syncing heap with database.");
     }
@@ -140,8 +158,6 @@ const TaskDetails = () => {
         await addTask(newTask);
       }
       loadAllTasks(); // Reload tasks from the database
-      loadHeapTasks(); // Reload heap tasks
-      loadPriorityTask(); // Reload priority task
       handleCloseDialog();
     } catch (error) {
       setErrorMessage("Error saving task. Please try again.");
@@ -154,8 +170,6 @@ const TaskDetails = () => {
       resetError();
       await deleteTask(taskId);
       loadAllTasks(); // Reload tasks from the database
-      loadHeapTasks(); // Reload heap tasks
-      loadPriorityTask(); // Reload priority task
     } catch (error) {
       setErrorMessage("Error deleting task. Please try again.");
     }